@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from account.models import User
+from account.models import User, UserProfile
 from account.api.serializers.userprofile_serializers import (
     UserProfileBookingDetailSerializer,
     UserProfileSerializer,
@@ -34,13 +34,16 @@ class UserDetailSerializer(UserSerializer):
             'is_admin',
             'verification_status',
         ]
+        # userprofile is joined by the viewset, no column of its own
+        sparse_sources = {'userprofile': []}
 
     def get_userprofile(self, obj):
+        # Admins and unverified students have no profile yet
         try:
-            return UserProfileUserDetailSerializer(obj.userprofile, context=self.context).data
-        except:
-            pass
-        return None
+            userprofile = obj.userprofile
+        except UserProfile.DoesNotExist:
+            return None
+        return UserProfileUserDetailSerializer(userprofile, context=self.context).data
 
 
 class UserListSerializer(serializers.ModelSerializer):
@@ -58,13 +61,14 @@ class UserListSerializer(serializers.ModelSerializer):
             'is_admin',
             'verification_status',
         ]
+        sparse_sources = {'userprofile': []}
 
     def get_userprofile(self, obj):
         try:
-            return UserProfileSerializer(obj.userprofile, context=self.context).data
-        except:
-            pass
-        return None
+            userprofile = obj.userprofile
+        except UserProfile.DoesNotExist:
+            return None
+        return UserProfileSerializer(userprofile, context=self.context).data
 
 
 class UserRegisterSerializer(UserSerializer):
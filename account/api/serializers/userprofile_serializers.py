@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from account.models import UserProfile
+from base.models import Faculty, StudyProgram
 
 
 class UserProfileSerializer(serializers.ModelSerializer):
@@ -15,16 +16,18 @@ class UserProfileBookingDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserProfile
         fields = ['student_id_number', 'whatsapp_number', 'faculty', 'studyprogram']
+        sparse_sources = {'faculty': ['faculty'], 'studyprogram': ['studyprogram']}
 
     def get_studyprogram(self, obj):
-        return obj.studyprogram.study_program_name
+        return StudyProgram.cached.get(obj.studyprogram_id).study_program_name
     
     def get_faculty(self, obj):
-        return obj.faculty.faculty_name
+        return Faculty.cached.get(obj.faculty_id).faculty_name
 
 
 class UserProfileUserDetailSerializer(UserProfileBookingDetailSerializer):
     class Meta:
         model = UserProfile
         exclude = ['user']
+        sparse_sources = {'faculty': ['faculty'], 'studyprogram': ['studyprogram']}
     
@@ -19,29 +19,37 @@ from account.api.serializers.user_serializers import (
     UserListSerializer,
     UserDetailSerializer
 )
-from account.api.serializers.userprofile_serializers import (
-    UserProfileSerializer,
-)
 
 from myapp.custom_pagination import CustomPaginationSerializer
 from myapp.my_utils.custom_response import CustomResponse
+from myapp.sparse_fieldsets import SparseFieldsetMixin
 
 
-class UserViewSet(ModelViewSet):
+class UserViewSet(SparseFieldsetMixin, ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
     filterset_fields = '__all__'
     ordering_fields = '__all__'
     pagination_class = CustomPaginationSerializer
+    cursor_ordering = ('-created_at', '-pk')
+    count_strategy = 'cached'
 
     def get_serializer_class(self):
         if self.action == 'list':
             return UserListSerializer
-        if self.action == 'retrieve':
+        if self.action in ['retrieve', 'me']:
             return UserDetailSerializer
         return super().get_serializer_class()
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ['list', 'retrieve', 'me']:
+            # Reverse one-to-one, joined with LEFT OUTER JOIN so users
+            # without a profile stay in the list
+            return queryset.select_related('userprofile')
+        return queryset
+
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
         serializer = self.get_serializer(instance)
@@ -49,6 +57,16 @@ class UserViewSet(ModelViewSet):
             message='Berhasil mengambil data',
             data=serializer.data,
         )
+
+    @action(methods=['GET'], detail=False)
+    def me(self, request, *args, **kwargs):
+        # The profile of the logged in user, no longer carried by the token
+        instance = self.get_queryset().get(pk=request.user.pk)
+        serializer = self.get_serializer(instance)
+        return CustomResponse.retrieve(
+            message='Berhasil mengambil data',
+            data=serializer.data,
+        )
         
     # @transaction.atomic
     @action(methods=['POST'], detail=False, permission_classes=[permissions.AllowAny])
@@ -172,17 +190,10 @@ class UserViewSet(ModelViewSet):
                 message='Penguna tidak ditemukan',
             )
         
+        # Sent with every request, so only the user id and the role; the
+        # profile is served by users/me
         refresh = RefreshToken.for_user(authenticated_user)
-        refresh['full_name'] = authenticated_user.full_name
-        refresh['email'] = authenticated_user.email
-        refresh['is_active'] = authenticated_user.is_active
         refresh['is_admin'] = authenticated_user.is_admin
-        refresh['verification_status'] = authenticated_user.verification_status
-
-        try:
-            refresh['userprofile'] = UserProfileSerializer(authenticated_user.userprofile).data
-        except:
-            pass
 
         login(request, authenticated_user)
 
@@ -264,7 +275,8 @@ class UserViewSet(ModelViewSet):
             )
         
         user.set_password(new_password)
-        user.save()
+        # Only the changed column, request.user may predate other writes
+        user.save(update_fields=['password'])
 
         return CustomResponse.ok(
             message='Berhasil mengganti password',
@@ -289,7 +301,7 @@ class UserViewSet(ModelViewSet):
         
         user = request.user
         user.email = email
-        user.save()
+        user.save(update_fields=['email'])
             
         serializer = self.get_serializer(otp_obj.user)
         return CustomResponse.retrieve(
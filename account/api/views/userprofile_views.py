@@ -6,12 +6,13 @@ from rest_framework.decorators import action
 
 from account.models import UserProfile, User
 from myapp.my_utils.custom_response import CustomResponse
+from myapp.sparse_fieldsets import SparseFieldsetMixin
 from account.api.serializers.userprofile_serializers import (
     UserProfileSerializer
 )
 
 
-class UserProfileViewSet(ModelViewSet):
+class UserProfileViewSet(SparseFieldsetMixin, ModelViewSet):
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
 
@@ -82,7 +83,9 @@ class UserProfileViewSet(ModelViewSet):
             userprofile.profile_pic = profile_pic
 
         userprofile = userprofile.save()
-        user.save()
+        if full_name:
+            # User.save() derives first_name from full_name
+            user.save(update_fields=['full_name', 'first_name'])
 
         serializer = self.get_serializer(userprofile)
 
@@ -0,0 +1,57 @@
+import copy
+import threading
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from myapp.my_utils import cache_utils
+
+
+# (version, user) of the recent tokens of this worker, by user_id. An
+# entry is used only while the user's cache_utils version is unchanged,
+# so a save in any worker drops it everywhere on the next request
+users = TTLCache(maxsize=10000, ttl=settings.AUTH_USER_CACHE_TIMEOUT)
+lock = threading.Lock()
+
+
+def user_version_name(user_id):
+    return f'user:{user_id}'
+
+
+def forget_user(sender, instance, **kwargs):
+    name = user_version_name(instance.pk)
+    cache_utils.bump_version(name)
+    # Again once committed, a request may have cached the old row meanwhile
+    transaction.on_commit(lambda: cache_utils.bump_version(name))
+
+
+post_save.connect(forget_user, sender=settings.AUTH_USER_MODEL)
+post_delete.connect(forget_user, sender=settings.AUTH_USER_MODEL)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that reads the user of a token from the database only
+    after the user was saved, or once per AUTH_USER_CACHE_TIMEOUT. Each
+    request costs one cache read of the user's version instead.
+    """
+
+    def get_user(self, validated_token):
+        user_id = str(validated_token.get(api_settings.USER_ID_CLAIM))
+        version = cache_utils.get_version(user_version_name(user_id))
+        with lock:
+            entry = users.get(user_id)
+        if entry is not None and entry[0] == version:
+            # A copy, views modify request.user
+            return copy.deepcopy(entry[1])
+
+        # Rejects unknown and inactive users, those are not cached
+        user = super().get_user(validated_token)
+        with lock:
+            users[user_id] = (version, copy.deepcopy(user))
+        return user
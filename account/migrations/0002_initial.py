@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('base', '0001_initial'),
+        ('account', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='faculty',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='base.faculty'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='studyprogram',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='base.studyprogram'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='otpcode',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
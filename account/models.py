@@ -41,7 +41,7 @@ class User(AbstractBaseUser):
         ('suspend', 'Suspend'),
     )
 
-    user_id = models.CharField(max_length=100, primary_key=True, unique=True, default=uuid.uuid4, editable=False)
+    user_id = models.UUIDField(primary_key=True, unique=True, default=uuid.uuid4, editable=False)
     full_name = models.CharField(max_length=255, null=True, blank=True)
     first_name = models.CharField(max_length=255, null=True, blank=True)
     email = models.EmailField(verbose_name='email address', max_length=255, unique=True)
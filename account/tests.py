@@ -1,9 +1,18 @@
 import json
+import datetime
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
 
-from account.models import OTPCode, User
+from account.authentication import user_version_name
+from account.models import OTPCode, User, UserProfile
 from base.models import StudyProgram, Faculty
+from myapp.my_utils import cache_utils, reference_cache
 
 
 class TestRegister(APITestCase):
@@ -87,3 +96,213 @@ class TestRegister(APITestCase):
 
 
 
+
+
+class TestUserKey(APITestCase):
+
+    def setUp(self):
+        faculty = Faculty.objects.create(faculty_name='saintek')
+        studyprogram = StudyProgram.objects.create(
+            study_program_name="informatika",
+            faculty=faculty
+        )
+        self.user = User.objects.create_user(
+            email='uuid@gmail.com',
+            password='12345678',
+            full_name='Test Uuid',
+            is_active=True,
+        )
+        UserProfile.objects.create(
+            user=self.user,
+            student_id_number='5210411101',
+            birth_date='2000-01-01',
+            whatsapp_number='088888888',
+            faculty=faculty,
+            studyprogram=studyprogram,
+        )
+
+    def test_login_token_carries_string_user_id(self):
+        response = self.client.post(reverse('user-login'), {
+            "email": "uuid@gmail.com",
+            "password": "12345678"
+        })
+        self.assertEqual(response.status_code, 200)
+
+        token = AccessToken(response.data['access'])
+        self.assertEqual(token['user_id'], str(self.user.user_id))
+        self.assertFalse(token['is_admin'])
+        # The profile moved to users/me
+        self.assertNotIn('userprofile', token)
+        self.assertNotIn('email', token)
+
+        response = self.client.get(
+            reverse('user-detail', args=[token['user_id']]),
+            HTTP_AUTHORIZATION=f'Bearer {response.data["access"]}',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['user_id'], str(self.user.user_id))
+
+    def test_token_user_is_cached_until_saved(self):
+        access = self.client.post(reverse('user-login'), {
+            "email": "uuid@gmail.com",
+            "password": "12345678"
+        }).data['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.client.get(reverse('user-me'))
+
+        # Only the profile query, the token's user comes from the cache
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('user-me'))
+        self.assertEqual(response.data['data']['userprofile']['student_id_number'], '5210411101')
+        self.assertEqual(response.data['data']['userprofile']['faculty'], 'saintek')
+
+        response = self.client.post(reverse('user-change-password'), {
+            'old_password': '12345678',
+            'new_password': '87654321',
+            'confirm_password': '87654321',
+        })
+        self.assertEqual(response.status_code, 200)
+
+        # A save in another worker: the row changes and the version moves,
+        # this worker's cached user must not be used or written back
+        User.objects.filter(pk=self.user.pk).update(verification_status='suspend')
+        cache_utils.bump_version(user_version_name(self.user.pk))
+        response = self.client.get(reverse('user-me'))
+        self.assertEqual(response.data['data']['verification_status'], 'suspend')
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('87654321'))
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('user-me')).status_code, 401)
+
+
+class TestUserQueries(APITestCase):
+
+    def setUp(self):
+        self.faculty = Faculty.objects.create(faculty_name='saintek')
+        self.studyprogram = StudyProgram.objects.create(
+            study_program_name="informatika",
+            faculty=self.faculty
+        )
+        self.admin = User.objects.create_superuser(
+            email='admin@gmail.com',
+            password='12345678',
+            full_name='Admin',
+        )
+        self.client.force_authenticate(self.admin)
+
+    def create_students(self, count, with_profile=True):
+        users = []
+        for _ in range(count):
+            index = User.objects.count()
+            user = User.objects.create(email=f'student{index}@gmail.com', full_name=f'Student {index}')
+            if with_profile:
+                UserProfile.objects.create(
+                    user=user,
+                    student_id_number=f'52104111{index:02}',
+                    birth_date='2000-01-01',
+                    whatsapp_number='088888888',
+                    faculty=self.faculty,
+                    studyprogram=self.studyprogram,
+                )
+            users.append(user)
+        # The cached list count is only dropped once a user write commits
+        cache.clear()
+        # Profiles read their names from the reference caches, warm them as
+        # the next request would once the writes above are committed
+        reference_cache.next_generation()
+        Faculty.cached.all()
+        StudyProgram.cached.all()
+        return users
+
+    def test_list_query_count_does_not_grow_with_users(self):
+        self.create_students(1)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('user-list'))
+        expected = len(queries)
+
+        self.create_students(5)
+        self.create_students(3, with_profile=False)
+        with self.assertNumQueries(expected):
+            response = self.client.get(reverse('user-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['data']), 10)
+        self.assertEqual(sum(user['userprofile'] is None for user in response.data['data']), 4)
+
+    def test_cursor_pages_break_created_at_ties_by_uuid(self):
+        self.create_students(7)
+        User.objects.update(created_at=timezone.now())
+        response = self.client.get(reverse('user-list'), {'pagination': 'cursor', 'page_size': 3})
+        ids = [user['user_id'] for user in response.data['data']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            ids += [user['user_id'] for user in response.data['data']]
+        self.assertEqual(ids, sorted((str(pk) for pk in User.objects.values_list('pk', flat=True)), reverse=True))
+
+    def test_detail_with_and_without_profile(self):
+        student, = self.create_students(1)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('user-detail', args=[student.user_id]))
+        self.assertEqual(response.data['data']['userprofile']['faculty'], 'saintek')
+        self.assertEqual(response.data['data']['userprofile']['studyprogram'], 'informatika')
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('user-detail', args=[self.admin.user_id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['data']['userprofile'])
+
+
+class TestAccountIndexes(APITestCase):
+
+    def setUp(self):
+        faculty = Faculty.objects.create(faculty_name='saintek')
+        studyprogram = StudyProgram.objects.create(
+            study_program_name="informatika",
+            faculty=faculty
+        )
+        users = User.objects.bulk_create([
+            User(email=f'index{index}@gmail.com', full_name=f'Test Index {index}')
+            for index in range(1000)
+        ])
+        OTPCode.objects.bulk_create([
+            OTPCode(
+                code=f'{index % 10000:04}',
+                expire=timezone.now() + datetime.timedelta(minutes=5),
+                user=user,
+            )
+            for index, user in enumerate(users)
+        ])
+        UserProfile.objects.bulk_create([
+            UserProfile(
+                user=user,
+                student_id_number=f'5210{index:06}',
+                birth_date='2000-01-01',
+                whatsapp_number='088888888',
+                faculty=faculty,
+                studyprogram=studyprogram,
+            )
+            for index, user in enumerate(users)
+        ])
+
+    def explain(self, queryset):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE account_user')
+            cursor.execute('ANALYZE account_otpcode')
+            cursor.execute('ANALYZE account_userprofile')
+        return queryset.explain()
+
+    def test_confirm_otp_uses_unique_user_index(self):
+        plan = self.explain(
+            OTPCode.objects.filter(code='0042', user__email='index42@gmail.com')
+        )
+        self.assertRegex(plan, r'Index Scan using account_user_email\w* on account_user')
+        # user is a OneToOneField, its unique index serves the lookup
+        self.assertRegex(plan, r'Index Scan using account_otpcode_user_id\w* on account_otpcode')
+
+    def test_student_id_lookup_uses_unique_index(self):
+        plan = self.explain(
+            UserProfile.objects.filter(student_id_number='5210000042')
+        )
+        # unique=True already gives student_id_number its index
+        self.assertRegex(plan, r'Index Scan using account_userprofile_student_id_number\w*')
@@ -5,24 +5,20 @@ from base.models import Article
 
 
 class ArticleListSerializer(serializers.ModelSerializer):
-    image = serializers.SerializerMethodField()
+    # Feed fields are written on save, nothing here touches the body or images
+    image = serializers.ImageField(source='cover_image', read_only=True)
     class Meta:
         model = Article
         fields = [
             'article_id', 
             'article_type', 
             'article_title', 
-            'article_body', 
+            'article_excerpt', 
             'article_link', 
             'time_since',
             'image',
         ]
-
-    def get_image(self, obj):
-        image = obj.articleimage_set.first()
-        if image:
-            return ArticleImageSerializer(image, context=self.context).data.get('article_image')
-        return None
+        sparse_sources = {'time_since': ['created_at']}
 
 
 class ArticleSerializer(serializers.ModelSerializer):
@@ -40,6 +36,11 @@ class ArticleSerializer(serializers.ModelSerializer):
             'formated_created_at',
             'images',
         ]
+        sparse_sources = {
+            'time_since': ['created_at'],
+            'formated_created_at': ['created_at'],
+            'images': [],
+        }
 
     def get_images(self, obj):
         images = obj.articleimage_set.all()
@@ -1,6 +1,11 @@
+import json
+
+from django.db import transaction
 from rest_framework import serializers
 
-from base.models import Booking
+from base.models import Booking, BookingMember, BookingTime, RoomOccupancy
+from notification.tasks import create_notification
+from myapp.my_utils import booking_code
 from account.api.serializers.user_serializers import (
     UserBookingDetailSerializer,
 )
@@ -13,10 +18,94 @@ from base.api.serializers.bookingtime_serializers import BookingTimeModelSeriali
 from base.api.serializers.bookingmember_serializers import BookingMemberBookingDetailSerializer
 
 
+# Indonesian day names, indexed by date.weekday()
+DAY_NAMES = ('Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat', 'Sabtu', 'Minggu')
+
+
 class BookingSerializer(serializers.ModelSerializer):
     class Meta:
         model = Booking
-        fields = '__all__'
+        exclude = ['id']
+
+
+class BookingBulkCreateSerializer(serializers.Serializer):
+    """
+    Turns the initiated booking (context['bookinginit']) into one pending
+    booking per requested slot, copying its members, in a single transaction.
+    """
+    bookingtime_id_list = serializers.JSONField()
+    booking_needs = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+    def validate_bookingtime_id_list(self, value):
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                raise serializers.ValidationError('Format waktu booking tidak valid')
+        if not isinstance(value, list):
+            value = [value]
+
+        bookingtime_id_list = list(dict.fromkeys(str(bookingtime_id) for bookingtime_id in value))
+        if not bookingtime_id_list:
+            raise serializers.ValidationError('Waktu booking tidak boleh kosong')
+
+        bookingtimes = BookingTime.cached.all()
+        if any(bookingtime_id not in bookingtimes for bookingtime_id in bookingtime_id_list):
+            raise serializers.ValidationError('Waktu booking tidak ditemukan')
+        return bookingtime_id_list
+
+    def create(self, validated_data):
+        bookinginit = self.context['bookinginit']
+        user = bookinginit.user
+        bookingtime_id_list = validated_data['bookingtime_id_list']
+
+        with transaction.atomic():
+            bookings = [
+                Booking(
+                    id=pk,
+                    booking_id=booking_code.encode(pk),
+                    booking_date=bookinginit.booking_date,
+                    booking_status='pending',
+                    booking_needs=validated_data.get('booking_needs'),
+                    bookingtime_id=bookingtime_id,
+                    user=user,
+                    room_id=bookinginit.room_id,
+                )
+                for pk, bookingtime_id in zip(
+                    Booking.reserve_ids(len(bookingtime_id_list)),
+                    bookingtime_id_list,
+                )
+            ]
+            Booking.objects.bulk_create(bookings)
+
+            # bulk_create skips the post_save signals, so the owner member
+            # and the occupancy index are written here
+            member_user_ids = [user.pk] + list(
+                bookinginit.bookingmember_set.exclude(
+                    user=user
+                ).values_list('user_id', flat=True)
+            )
+            BookingMember.objects.bulk_create([
+                BookingMember(booking=booking, user_id=member_user_id)
+                for booking in bookings
+                for member_user_id in member_user_ids
+            ])
+            RoomOccupancy.occupy(
+                bookinginit.room_id,
+                bookinginit.booking_date,
+                bookingtime_id_list,
+            )
+
+            bookinginit.delete()
+
+            booking_codes = ', '.join(f'#{booking.booking_id}' for booking in bookings)
+            transaction.on_commit(lambda: create_notification.delay(
+                title='Booking Diajukan',
+                body=f'Hai {user.first_name}, booking anda dengan ID Reservasi {booking_codes} telah diajukan',
+                user_id=str(user.user_id),
+            ))
+
+        return bookings
 
 
 class BookingHistorySerializer(serializers.ModelSerializer):
@@ -26,20 +115,12 @@ class BookingHistorySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Booking
-        fields = '__all__'
+        exclude = ['id']
+        # Columns the SerializerMethodFields read, for ?fields= (SparseFieldsetMixin)
+        sparse_sources = {'booking_day': ['booking_date']}
 
     def get_booking_day(self, obj):
-        day = obj.booking_date.strftime("%A")
-        match_day = {
-            'Monday': 'Senin',
-            'Tuesday': 'Selasa',
-            'Wednesday': 'Rabu',
-            'Thursday': 'Kamis',
-            'Friday': 'Jumat',
-            'Saturday': 'Sabtu',
-            'Sunday': 'Minggu',
-        }
-        return match_day[day]
+        return DAY_NAMES[obj.booking_date.weekday()]
 
 
 class BookingDetailModelSerializer(serializers.ModelSerializer):
@@ -65,20 +146,12 @@ class BookingDetailModelSerializer(serializers.ModelSerializer):
             'room',
             'bookingmember',
         ]
+        sparse_sources = {'booking_day': ['booking_date'], 'bookingmember': []}
 
     def get_bookingmember(self, obj):
-        bookingmembers = obj.bookingmember_set.filter()
+        # .all() so the prefetch from the viewset is used
+        bookingmembers = obj.bookingmember_set.all()
         return BookingMemberBookingDetailSerializer(bookingmembers, many=True).data
     
     def get_booking_day(self, obj):
-        day = obj.booking_date.strftime("%A")
-        match_day = {
-            'Monday': 'Senin',
-            'Tuesday': 'Selasa',
-            'Wednesday': 'Rabu',
-            'Thursday': 'Kamis',
-            'Friday': 'Jumat',
-            'Saturday': 'Sabtu',
-            'Sunday': 'Minggu',
-        }
-        return match_day[day]
\ No newline at end of file
+        return DAY_NAMES[obj.booking_date.weekday()]
\ No newline at end of file
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from base.models import BookingMember
+from base.models import Booking, BookingMember
 
 from account.api.serializers.user_serializers import (
     UserBookingDetailSerializer
@@ -8,6 +8,11 @@ from account.api.serializers.user_serializers import (
 
 
 class BookingMemberModelSerializer(serializers.ModelSerializer):
+    booking = serializers.SlugRelatedField(
+        slug_field='booking_id',
+        queryset=Booking.objects.all(),
+    )
+
     class Meta:
         model = BookingMember
         fields = "__all__"
@@ -1,8 +1,6 @@
-import datetime
-
 from rest_framework import serializers
 
-from base.models import BookingTime
+from base.models import BookingTime, RoomOccupancy
 
 
 class BookingTimeModelSerializer(serializers.ModelSerializer):
@@ -11,21 +9,21 @@ class BookingTimeModelSerializer(serializers.ModelSerializer):
     class Meta:
         model = BookingTime
         fields = '__all__'
+        # Read by is_available of BookingTimeAvaliableModelSerializer
+        sparse_sources = {'is_available': ['start_time']}
+
+    def validate(self, attrs):
+        if self.instance is None and BookingTime.objects.count() >= RoomOccupancy.MAX_SLOTS:
+            raise serializers.ValidationError(f'Booking time maksimal {RoomOccupancy.MAX_SLOTS}')
+        return attrs
 
 
 class BookingTimeAvaliableModelSerializer(BookingTimeModelSerializer):
     is_available = serializers.SerializerMethodField()
 
     def get_is_available(self, obj):
-        time_now = datetime.datetime.now().time()
-        date_now = self.context['request'].query_params.get('date')
-
-        available_bookingtimes = self.context.get('available_bookingtimes')
-        if obj not in available_bookingtimes:
+        occupied_bookingtime_ids = self.context.get('occupied_bookingtime_ids', set())
+        if obj.bookingtime_id in occupied_bookingtime_ids:
             return False
-        
-        if date_now == datetime.datetime.now().strftime("%Y-%m-%d"):
-            if obj.start_time <= time_now:
-                return False
-        
-        return True
\ No newline at end of file
+
+        return not obj.has_started(self.context['booking_date'], self.context.get('now'))
\ No newline at end of file
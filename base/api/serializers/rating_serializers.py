@@ -1,19 +1,28 @@
 from rest_framework import serializers
 
-from base.models import Rating
+from base.models import Booking, Rating
 
 
 class RatingModelSerializer(serializers.ModelSerializer):
+    booking = serializers.SlugRelatedField(
+        slug_field='booking_id',
+        queryset=Booking.objects.all(),
+        required=False,
+        allow_null=True,
+    )
+
     class Meta:
         model = Rating
         fields = '__all__'
 
 
 class RatingDetailModelSerializer(serializers.ModelSerializer):
+    booking = serializers.SlugRelatedField(slug_field='booking_id', read_only=True)
     user = serializers.SerializerMethodField()
     class Meta:
         model = Rating
         fields = '__all__'
+        sparse_sources = {'user': ['booking']}
 
     def get_user(self, obj):
         return obj.booking.user.full_name
\ No newline at end of file
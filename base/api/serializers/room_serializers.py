@@ -1,9 +1,8 @@
 from rest_framework import serializers
 
-from base.api.serializers.rating_serializers import RatingDetailModelSerializer
 from base.api.serializers.roomfacility_serializers import RoomFacilityModelSerializer
 from base.api.serializers.roomimage_serializers import RoomImageModelSerializer
-from base.models import Room, Rating, RoomFacility
+from base.models import Room
 
 
 class RoomModelSerializer(serializers.ModelSerializer):
@@ -34,6 +33,7 @@ class RoomListModelSerializer(serializers.ModelSerializer):
             "room_description",
             "roomimages",
         ]
+        sparse_sources = {'roomimages': []}
 
     def get_roomimages(self, obj):
         roomimages = obj.roomimage_set.all()
@@ -41,7 +41,7 @@ class RoomListModelSerializer(serializers.ModelSerializer):
 
 
 class RoomDetailModelSerializer(serializers.ModelSerializer):
-    ratings = serializers.SerializerMethodField()
+    rating_summary = serializers.SerializerMethodField()
     facilities = serializers.SerializerMethodField()
     roomimages = serializers.SerializerMethodField()
     class Meta:
@@ -56,17 +56,27 @@ class RoomDetailModelSerializer(serializers.ModelSerializer):
             "room_rating",
             "total_raters",
             "created_at",
-            "ratings",
+            "rating_summary",
             "facilities",
             "roomimages",
         ]
+        sparse_sources = {
+            'rating_summary': ['room_rating', 'total_raters', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5'],
+            'facilities': [],
+            'roomimages': [],
+        }
+
+    def get_rating_summary(self, obj):
+        # Kept on the room by the Rating signals, the ratings themselves are
+        # paginated under rooms/{id}/ratings
+        return {
+            'average': round(obj.room_rating, 2),
+            'count': obj.total_raters,
+            'histogram': obj.rating_histogram,
+        }
 
-    def get_ratings(self, obj):
-        ratings = Rating.objects.filter(booking__room=obj)
-        return RatingDetailModelSerializer(ratings, many=True).data
-    
     def get_facilities(self, obj):
-        facilities = RoomFacility.objects.filter(room=obj)
+        facilities = obj.roomfacility_set.all()
         return RoomFacilityModelSerializer(facilities, many=True, context=self.context).data
     
     def get_roomimages(self, obj):
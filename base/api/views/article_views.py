@@ -1,5 +1,9 @@
+from django.conf import settings
+from django.core.cache import cache
+
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
 from myapp.my_utils.custom_response import CustomResponse
 from base.api.serializers.article_serializers import (
@@ -9,21 +13,54 @@ from base.api.serializers.article_serializers import (
 from base.models import Article
 
 from myapp.custom_pagination import CustomPaginationSerializer
+from myapp.my_utils import cache_utils
+from myapp.sparse_fieldsets import SparseFieldsetMixin
 
 
-class ArticleModelViewSet(ModelViewSet):
+# No ConditionalGetMixin: time_since changes with the clock, not with the
+# articles, so a validator would keep it stale
+class ArticleModelViewSet(SparseFieldsetMixin, ModelViewSet):
     queryset = Article.objects.all()
     serializer_class = ArticleSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = CustomPaginationSerializer
-    filterset_fields = '__all__'
+    filterset_fields = ['article_id', 'article_type', 'article_title', 'article_body', 'article_link', 'created_at']
 
     def get_serializer_class(self):
         if self.action == 'list':
             return ArticleListSerializer
         return self.serializer_class
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            return queryset.defer('article_body')
+        return queryset
+
+    # Query parameters the pages depend on: pagination, sparse fieldsets,
+    # ordering and the filterset
+    cache_params = ['page', 'page_size', 'fields', 'omit', 'ordering'] + filterset_fields
+
+    def cached_response(self, request, render):
+        # Rendered pages are shared by every user, the article signals bump
+        # the version and drop them all
+        key = cache_utils.make_key(
+            'articles',
+            self.action,
+            self.kwargs.get(self.lookup_url_kwarg or self.lookup_field),
+            *cache_utils.request_parts(request, self.cache_params),
+        )
+        data = cache.get(key)
+        if data is None:
+            response = render()
+            cache.set(key, response.data, settings.ARTICLE_CACHE_TIMEOUT)
+            return response
+        return Response(data)
+
     def list(self, request, *args, **kwargs):
+        return self.cached_response(request, self.render_list)
+
+    def render_list(self):
         queryset = self.filter_queryset(self.get_queryset())
 
         page = self.paginate_queryset(queryset)
@@ -38,6 +75,9 @@ class ArticleModelViewSet(ModelViewSet):
         )
     
     def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, self.render_retrieve)
+
+    def render_retrieve(self):
         instance = self.get_object()
         serializer = self.get_serializer(instance)
         return CustomResponse.retrieve(
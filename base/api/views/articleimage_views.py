@@ -8,9 +8,10 @@ from base.api.serializers.articleimage_serializers import (
 from base.models import ArticleImage
 
 from myapp.custom_pagination import CustomPaginationSerializer
+from myapp.sparse_fieldsets import SparseFieldsetMixin
 
 
-class ArticleImageModelViewSet(ModelViewSet):
+class ArticleImageModelViewSet(SparseFieldsetMixin, ModelViewSet):
     queryset = ArticleImage.objects.all()
     serializer_class = ArticleImageSerializer
     permission_classes = [IsAuthenticated]
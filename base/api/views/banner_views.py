@@ -4,12 +4,15 @@ from rest_framework.permissions import IsAuthenticated
 from base.api.serializers.banner_serializers import BannerSerializer
 from base.models import Banner
 from myapp.my_utils.custom_response import CustomResponse
+from myapp.sparse_fieldsets import SparseFieldsetMixin
+from myapp.conditional_get import ConditionalGetMixin
 
 
-class BannerModelViewSet(ModelViewSet):
+class BannerModelViewSet(ConditionalGetMixin, SparseFieldsetMixin, ModelViewSet):
     queryset = Banner.objects.all()
     serializer_class = BannerSerializer
     permission_classes = [IsAuthenticated]
+    etag_versions = ['banners']
     filterset_fields = ['banner_id', 'created_at']
     ordering_fields = ['banner_id', 'created_at']
 
@@ -1,4 +1,5 @@
 import json
+import logging
 import datetime
 
 from rest_framework.viewsets import ModelViewSet
@@ -7,30 +8,67 @@ from rest_framework.decorators import action
 
 from myapp.custom_pagination import CustomPaginationSerializer
 from myapp.my_utils.custom_response import CustomResponse
-from base.models import Booking, BookingMember, CeleryTask, BookingTime
+from myapp.sparse_fieldsets import SparseFieldsetMixin
+from base.models import Booking, BookingMember, CeleryTask, BookingTime, RoomOccupancy
 from base.api.serializers.booking_serializers import (
     BookingSerializer,
+    BookingBulkCreateSerializer,
     BookingDetailModelSerializer,
     BookingHistorySerializer,
 )
 
 from paho.mqtt import publish
 from django.conf import settings
-from django.db.models import Q
-from django.db import transaction
+from django.db.models import Q, Prefetch
+from django.db import transaction, IntegrityError
 
 from celery.result import AsyncResult
 
 from notification.tasks import create_notification
 
 
-class BookingModelViewSet(ModelViewSet):
+logger = logging.getLogger(__name__)
+
+
+class BookingModelViewSet(SparseFieldsetMixin, ModelViewSet):
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated]
+    lookup_field = 'booking_id'
     filterset_fields = '__all__'
     ordering_fields = '__all__'
     pagination_class = CustomPaginationSerializer
+    # Opt-in keyset paging for the list and history, see CustomPaginationSerializer
+    cursor_ordering = ('-created_at', '-pk')
+    # The admin list is unfiltered, history falls back to an exact count
+    count_strategy = 'estimated'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'history':
+            # BookingHistorySerializer nests room and bookingtime, the
+            # bookingtime comes from BookingTime.cached
+            queryset = queryset.select_related('room')
+        if self.action == 'retrieve':
+            # Everything BookingDetailModelSerializer reads, in three queries
+            # however many members the booking has. Bookingtimes, faculties
+            # and study programs come from their reference caches
+            queryset = queryset.select_related(
+                'room',
+                'user__userprofile',
+            )
+            if self.sparse_field_requested('room'):
+                queryset = queryset.prefetch_related('room__roomimage_set')
+            if self.sparse_field_requested('bookingmember'):
+                queryset = queryset.prefetch_related(
+                    Prefetch(
+                        'bookingmember_set',
+                        queryset=BookingMember.objects.select_related(
+                            'user__userprofile',
+                        ).order_by('bookingmember_id'),
+                    ),
+                )
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -41,17 +79,14 @@ class BookingModelViewSet(ModelViewSet):
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
+        BookingTime.cached.attach([instance], 'bookingtime')
         serializer = self.get_serializer(instance)
         return CustomResponse.retrieve(
             message='Booking berhasil diambil',
             data=serializer.data
         )
 
-    # @transaction.atomic
     def create(self, request, *args, **kwargs):
-        bookingtime_id_list = json.loads(request.data.get('bookingtime_id_list'))
-        booking_needs = request.data.get('booking_needs')
-
         bookinginit = self.get_queryset().filter(
             user=request.user,
             booking_status='initiated',
@@ -61,33 +96,23 @@ class BookingModelViewSet(ModelViewSet):
             return CustomResponse.bad_request(
                 message='Booking belum diinisialisasi',
             )
-        
 
-        for bookingtime_id in bookingtime_id_list:
-            request.data.update({
-                'user': request.user.user_id,
-                'bookingtime': bookingtime_id,
-                'booking_needs': booking_needs,
-                'booking_status': 'pending',
-                'booking_date': bookinginit.booking_date,
-                'room': bookinginit.room.room_id,
-            })
-          
-            serializer = self.get_serializer(data=request.data)
-            if serializer.is_valid():
-                booking = serializer.save()
-                bookingmembers = bookinginit.bookingmember_set.exclude(
-                    user=request.user
-                )
-                for bookingmember in bookingmembers:
-                    BookingMember.objects.create(
-                        booking=booking,
-                        user=bookingmember.user
-                    )
-            else:
-                return CustomResponse.serializers_erros(serializer.errors)
-            
-        bookinginit.delete()
+        serializer = BookingBulkCreateSerializer(
+            data=request.data,
+            context={'request': request, 'bookinginit': bookinginit},
+        )
+        if not serializer.is_valid():
+            return CustomResponse.serializers_erros(serializer.errors)
+
+        # The partial unique index on (room, booking_date, bookingtime)
+        # rejects slots already held by a pending/active booking
+        try:
+            serializer.save()
+        except IntegrityError:
+            return CustomResponse.bad_request(
+                message='Booking tidak tersedia',
+            )
+
         return CustomResponse.ok(
             message='Booking berhasil dibuat',
         )
@@ -96,16 +121,17 @@ class BookingModelViewSet(ModelViewSet):
     def initialize(self, request, *args, **kwargs):
         room_id = request.data.get('room_id')
         booking_date = request.data.get('booking_date')
-        bookingtime_id_list = request.data.get('bookingtime_id_list')
-
-        bookings = self.get_queryset().filter(
-            Q(booking_status='pending') | Q(booking_status='active'),
-            booking_date=booking_date,
-            room__room_id=room_id,
-            bookingtime_id__in=bookingtime_id_list
+        bookingtime_id_list = request.data.get('bookingtime_id_list') or []
+        if isinstance(bookingtime_id_list, str):
+            bookingtime_id_list = json.loads(bookingtime_id_list)
+        bookingtime_id_list = [str(bookingtime_id) for bookingtime_id in bookingtime_id_list]
+
+        occupied_bookingtime_ids = RoomOccupancy.occupied_bookingtime_ids(
+            room_id,
+            booking_date,
         )
 
-        if bookings:
+        if occupied_bookingtime_ids.intersection(bookingtime_id_list):
             return CustomResponse.bad_request(
                 message='Booking tidak tersedia',
             )
@@ -174,10 +200,10 @@ class BookingModelViewSet(ModelViewSet):
 
         page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
+            serializer = self.get_serializer(BookingTime.cached.attach(page, 'bookingtime'), many=True)
             return self.get_paginated_response(serializer.data)
 
-        serializer = self.get_serializer(queryset, many=True)
+        serializer = self.get_serializer(BookingTime.cached.attach(queryset, 'bookingtime'), many=True)
         return CustomResponse.list(
             message='Booking berhasil diambil',
             data=serializer.data
@@ -208,9 +234,13 @@ class BookingModelViewSet(ModelViewSet):
             )
         
         booking.booking_status = booking_status
-        booking.save()
-        booking.user.verrifcation_status = 'suspend'
-        booking.user.save()
+        try:
+            with transaction.atomic():
+                booking.save()
+        except IntegrityError:
+            return CustomResponse.bad_request(
+                message='Booking tidak tersedia',
+            )
         return CustomResponse.ok(
             message='Booking status berhasil diubah',
         )
@@ -263,12 +293,15 @@ class BookingModelViewSet(ModelViewSet):
         message = 'True'
 
         # Melakukan publish pesan
-        publish.single(
-            settings.MQTT_TOPIC, 
-            message, 
-            hostname=settings.MQTT_SERVER, 
-            port=settings.MQTT_PORT,
-        )
+        if settings.MQTT_ENABLED:
+            publish.single(
+                settings.MQTT_TOPIC, 
+                message, 
+                hostname=settings.MQTT_SERVER, 
+                port=settings.MQTT_PORT,
+            )
+        else:
+            logger.info('MQTT disabled, not publishing %s to %s', message, settings.MQTT_TOPIC)
     
         return CustomResponse.ok(
             message='Berhasil scan QR Code',
@@ -286,7 +319,7 @@ class BookingModelViewSet(ModelViewSet):
                 message='Waktu baru diperlukan',
             )
         
-        bookingtime = BookingTime.objects.filter(bookingtime_id=new_bookingtime).first()
+        bookingtime = BookingTime.cached.get(new_bookingtime)
 
         if not new_booking_date:
             return CustomResponse.bad_request(
@@ -303,29 +336,29 @@ class BookingModelViewSet(ModelViewSet):
                 message='Booking tidak dapat direschedule',
             )
         
-        # Check if time is booked
-        booking_exists = Booking.objects.filter(
-            booking_date=new_booking_date, 
-            bookingtime=bookingtime
-        ).exclude(booking_id=booking.booking_id).first()
-        if booking_exists:
+        celerytasks = list(CeleryTask.objects.filter(booking=booking))
+
+        # Claim the new slot first, the partial unique index rejects it
+        # when a pending/active booking already holds it
+        try:
+            with transaction.atomic():
+                booking.reschedule(new_booking_date, bookingtime)
+        except IntegrityError:
             return CustomResponse.bad_request(
-                message=f'Gagal direschedule, booking telah ada. Kode booking: {booking_exists.booking_id}',
+                message='Booking tidak tersedia',
             )
-        
-        celerytasks = CeleryTask.objects.filter(booking=booking)
-        if celerytasks.exists():
-            for celerytask in celerytasks:
-                task = AsyncResult(celerytask.task_id)
-                task.revoke()
-        celerytasks.delete()
 
-        booking.reschedule(new_booking_date, bookingtime)
+        for celerytask in celerytasks:
+            task = AsyncResult(celerytask.task_id)
+            task.revoke()
+        CeleryTask.objects.filter(
+            celerytask_id__in=[celerytask.celerytask_id for celerytask in celerytasks]
+        ).delete()
 
         create_notification.delay(
             title='Reschedule Booking',
             body=f'Booking {booking.booking_id} berhasil direschedule',
-            user_id=booking.user.user_id,
+            user_id=str(booking.user.user_id),
             booking_id=None,
             write=True,
         )
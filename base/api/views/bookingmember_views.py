@@ -8,9 +8,10 @@ from base.api.serializers.bookingmember_serializers import (
     BookingMemberBookingDetailSerializer
 )
 from myapp.my_utils.custom_response import CustomResponse
+from myapp.sparse_fieldsets import SparseFieldsetMixin
 
 
-class BookingMemberModelViewSet(ModelViewSet):
+class BookingMemberModelViewSet(SparseFieldsetMixin, ModelViewSet):
     queryset = BookingMember.objects.all()
     serializer_class = BookingMemberModelSerializer
     permission_classes = [IsAuthenticated]
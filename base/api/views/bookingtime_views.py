@@ -1,22 +1,29 @@
-from django.db.models import Q
+import datetime
+
+from django.utils import timezone
 
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 
-from base.models import BookingTime, Booking
+from base.models import BookingTime, Room, RoomOccupancy
 from base.api.serializers.bookingtime_serializers import (
     BookingTimeModelSerializer,
     BookingTimeAvaliableModelSerializer,
 )
 
 from myapp.my_utils.custom_response import CustomResponse
+from myapp.sparse_fieldsets import SparseFieldsetMixin
+from myapp.conditional_get import ConditionalGetMixin
 
 
-class BookingTimeModelViewSet(ModelViewSet):
+class BookingTimeModelViewSet(ConditionalGetMixin, SparseFieldsetMixin, ModelViewSet):
     queryset = BookingTime.objects.all()
     serializer_class = BookingTimeModelSerializer
     permission_classes = [IsAuthenticated]
+    etag_versions = ['bookingtimes']
+
+    MATRIX_MAX_DAYS = 31
 
     def get_serializer_class(self):
         if self.action == 'available':
@@ -44,7 +51,6 @@ class BookingTimeModelViewSet(ModelViewSet):
 
     @action(methods=['GET'], detail=False)
     def available(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
         date = self.request.query_params.get('date')
         room_id = self.request.query_params.get('room_id')
 
@@ -58,21 +64,26 @@ class BookingTimeModelViewSet(ModelViewSet):
                 message='Room Id tidak boleh kosong'
             )
 
-        # Check if there is any booking on the same date and room
-        bookingtime_ids = Booking.objects.filter(
-            Q(booking_status='pending') | Q(booking_status='active'),
-            booking_date=date,
-            room__room_id=room_id,
-        ).values_list('bookingtime', flat=True)
+        try:
+            date = datetime.date.fromisoformat(date)
+        except ValueError:
+            return CustomResponse.bad_request(
+                message='Tanggal booking harus berformat YYYY-MM-DD'
+            )
 
-        available_bookingtimes = queryset.exclude(
-            bookingtime_id__in=bookingtime_ids
-        )
-        # End of checking
+        bookingtimes = BookingTime.by_start_time()
+
+        # Slots held by pending/active bookings, read from the occupancy index
         context = self.get_serializer_context()
-        context['available_bookingtimes'] = available_bookingtimes
+        context['booking_date'] = date
+        context['now'] = timezone.now()
+        context['occupied_bookingtime_ids'] = RoomOccupancy.occupied_bookingtime_ids(
+            room_id,
+            date,
+            [bookingtime.bookingtime_id for bookingtime in bookingtimes],
+        )
         serializer = self.get_serializer(
-            queryset, 
+            bookingtimes, 
             many=True,
             context=context,
         )
@@ -86,3 +97,82 @@ class BookingTimeModelViewSet(ModelViewSet):
             data=serializer.data,
             message='Available booking times berhasil diambil',
         )
+
+    @action(methods=['GET'], detail=False)
+    def matrix(self, request, *args, **kwargs):
+        """
+        Availability of rooms x days x slots in one response. Every day of
+        a room is a bitstring over `bookingtimes` ("1" = available).
+        """
+        try:
+            start_date = datetime.date.fromisoformat(request.query_params.get('start_date', ''))
+            end_date = datetime.date.fromisoformat(request.query_params.get('end_date', ''))
+        except ValueError:
+            return CustomResponse.bad_request(
+                message='Tanggal mulai dan tanggal akhir harus berformat YYYY-MM-DD'
+            )
+
+        if end_date < start_date:
+            return CustomResponse.bad_request(
+                message='Tanggal akhir tidak boleh sebelum tanggal mulai'
+            )
+
+        total_days = (end_date - start_date).days + 1
+        if total_days > self.MATRIX_MAX_DAYS:
+            return CustomResponse.bad_request(
+                message=f'Rentang tanggal maksimal {self.MATRIX_MAX_DAYS} hari'
+            )
+
+        rooms = Room.objects.order_by('floor', 'room_id')
+        try:
+            if request.query_params.get('room_ids'):
+                rooms = rooms.filter(room_id__in=[
+                    int(room_id) for room_id in request.query_params['room_ids'].split(',')
+                ])
+            if request.query_params.get('floors'):
+                rooms = rooms.filter(floor__in=[
+                    int(floor) for floor in request.query_params['floors'].split(',')
+                ])
+        except ValueError:
+            return CustomResponse.bad_request(
+                message='Room Id dan lantai harus berupa angka'
+            )
+        rooms = list(rooms.values('room_id', 'room_name', 'floor'))
+
+        bookingtimes = BookingTime.by_start_time()
+        bits = RoomOccupancy.slot_bits([bookingtime.bookingtime_id for bookingtime in bookingtimes])
+        masks = RoomOccupancy.get_masks(
+            [room['room_id'] for room in rooms],
+            start_date,
+            end_date,
+        )
+
+        # Same rule as the available serializer, see BookingTime.has_started
+        now = timezone.now()
+        days = [start_date + datetime.timedelta(days=offset) for offset in range(total_days)]
+        past_masks = {}
+        for day in days:
+            past_mask = 0
+            for bookingtime in bookingtimes:
+                if bookingtime.has_started(day, now):
+                    past_mask |= bits[bookingtime.bookingtime_id]
+            past_masks[day] = past_mask
+
+        for room in rooms:
+            room['availability'] = {}
+            for day in days:
+                unavailable = masks.get((room['room_id'], day), 0) | past_masks[day]
+                room['availability'][day.isoformat()] = ''.join(
+                    '0' if unavailable & bits[bookingtime.bookingtime_id] else '1'
+                    for bookingtime in bookingtimes
+                )
+
+        return CustomResponse.list(
+            data={
+                'start_date': start_date.isoformat(),
+                'end_date': end_date.isoformat(),
+                'bookingtimes': BookingTimeModelSerializer(bookingtimes, many=True).data,
+                'rooms': rooms,
+            },
+            message='Matrix ketersediaan berhasil diambil',
+        )
@@ -4,11 +4,14 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from base.api.serializers.faculty_serializers import FacultyModelSerializer
 from base.models import Faculty
 from myapp.my_utils.custom_response import CustomResponse
+from myapp.sparse_fieldsets import SparseFieldsetMixin
+from myapp.conditional_get import ConditionalGetMixin
 
 
-class FacultyModelViewSet(ModelViewSet):
+class FacultyModelViewSet(ConditionalGetMixin, SparseFieldsetMixin, ModelViewSet):
     queryset = Faculty.objects.all()
     permission_classes = [AllowAny]
+    etag_versions = ['faculties']
     serializer_class = FacultyModelSerializer
 
     def list(self, request, *args, **kwargs):
@@ -4,9 +4,10 @@ from rest_framework.permissions import IsAuthenticated
 from base.api.serializers.rating_serializers import RatingModelSerializer
 from base.models import Rating
 from myapp.my_utils.custom_response import CustomResponse
+from myapp.sparse_fieldsets import SparseFieldsetMixin
 
 
-class RatingModelViewSet(ModelViewSet):
+class RatingModelViewSet(SparseFieldsetMixin, ModelViewSet):
     queryset = Rating.objects.all()
     serializer_class = RatingModelSerializer
     permission_classes = [IsAuthenticated]
@@ -1,5 +1,12 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F, Prefetch, Window
+from django.db.models.functions import RowNumber
+
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import action
+from rest_framework.response import Response
 
 from myapp.my_utils.custom_response import CustomResponse
 from base.api.serializers.room_serializers import (
@@ -7,16 +14,46 @@ from base.api.serializers.room_serializers import (
     RoomDetailModelSerializer,
     RoomListModelSerializer,
 )
-from base.models import Room
-from myapp.custom_pagination import CustomPaginationSerializer
+from base.api.serializers.rating_serializers import RatingDetailModelSerializer
+from base.models import Rating, Room, RoomFacility, RoomImage
+from myapp.custom_pagination import CustomPaginationSerializer, CustomCursorPagination
+from myapp.my_utils import cache_utils
+from myapp.sparse_fieldsets import SparseFieldsetMixin
+from myapp.conditional_get import ConditionalGetMixin
 
 
-class RoomModelViewSet(ModelViewSet):
+class RoomModelViewSet(ConditionalGetMixin, SparseFieldsetMixin, ModelViewSet):
     queryset = Room.objects.all()
     serializer_class = RoomModelSerializer
     permission_classes = [IsAuthenticated]
+    etag_versions = ['rooms']
     pagination_class = CustomPaginationSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list' and self.sparse_field_requested('roomimages'):
+            roomimages = RoomImage.objects.order_by('roomimage_id')
+            if self.request.query_params.get('first_image') in ['true', '1']:
+                # Only the first image of every room, e.g. for the home carousel
+                roomimages = roomimages.annotate(
+                    row_number=Window(
+                        RowNumber(),
+                        partition_by=F('room_id'),
+                        order_by=F('roomimage_id').asc(),
+                    ),
+                ).filter(row_number=1)
+            queryset = queryset.prefetch_related(Prefetch('roomimage_set', queryset=roomimages))
+        if self.action == 'retrieve':
+            if self.sparse_field_requested('roomimages'):
+                queryset = queryset.prefetch_related(
+                    Prefetch('roomimage_set', queryset=RoomImage.objects.order_by('roomimage_id')),
+                )
+            if self.sparse_field_requested('facilities'):
+                queryset = queryset.prefetch_related(
+                    Prefetch('roomfacility_set', queryset=RoomFacility.objects.order_by('roomfacility_id')),
+                )
+        return queryset
+
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return RoomDetailModelSerializer
@@ -39,6 +76,26 @@ class RoomModelViewSet(ModelViewSet):
         )
     
     def retrieve(self, request, *args, **kwargs):
+        # One payload per room, host of the image links and sparse fieldset,
+        # dropped by the room, image, facility and rating writes. After a
+        # write only one request rebuilds it, the others wait for it
+        try:
+            room_id = Room._meta.pk.to_python(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except ValidationError:
+            return self.render_retrieve()
+        key = cache_utils.make_key(
+            Room.detail_version_name(room_id),
+            room_id,
+            *cache_utils.request_parts(request, ['fields', 'omit']),
+        )
+        data = cache_utils.get_or_set_once(
+            key,
+            lambda: self.render_retrieve().data,
+            settings.ROOM_CACHE_TIMEOUT,
+        )
+        return Response(data)
+
+    def render_retrieve(self):
         instance = self.get_object()
         serializer = self.get_serializer(instance)
         return CustomResponse.retrieve(
@@ -46,6 +103,17 @@ class RoomModelViewSet(ModelViewSet):
             data=serializer.data,
         )
     
+    @action(methods=['GET'], detail=True)
+    def ratings(self, request, *args, **kwargs):
+        room = self.get_object()
+        # Newest first, the author name comes with the same query
+        queryset = Rating.objects.filter(booking__room=room).select_related('booking__user')
+
+        paginator = CustomCursorPagination()
+        page = paginator.paginate_queryset(queryset, request)
+        serializer = RatingDetailModelSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
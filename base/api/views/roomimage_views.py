@@ -2,6 +2,7 @@ from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated
 
 from myapp.my_utils.custom_response import CustomResponse
+from myapp.sparse_fieldsets import SparseFieldsetMixin
 from base.api.serializers.roomimage_serializers import (
     RoomImageModelSerializer,
     RoomImageCreateModelSerializer,
@@ -9,7 +10,7 @@ from base.api.serializers.roomimage_serializers import (
 from base.models import RoomImage
 
 
-class RoomImageModelViewSet(ModelViewSet):
+class RoomImageModelViewSet(SparseFieldsetMixin, ModelViewSet):
     queryset = RoomImage.objects.all()
     serializer_class = RoomImageModelSerializer
     permission_classes = [IsAuthenticated]
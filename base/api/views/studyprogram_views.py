@@ -5,12 +5,15 @@ from base.api.serializers.studyprogram_serializers import StudyProgramModelSeria
 
 from base.models import StudyProgram
 from myapp.my_utils.custom_response import CustomResponse
+from myapp.sparse_fieldsets import SparseFieldsetMixin
+from myapp.conditional_get import ConditionalGetMixin
 
 
-class StudyProgramModelViewSet(ModelViewSet):
+class StudyProgramModelViewSet(ConditionalGetMixin, SparseFieldsetMixin, ModelViewSet):
     queryset = StudyProgram.objects.all()
     serializer_class = StudyProgramModelSerializer
     permission_classes = [AllowAny]
+    etag_versions = ['studyprograms']
     filterset_fields = '__all__'
 
 
@@ -0,0 +1,62 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from base.api.serializers.booking_serializers import BookingHistorySerializer
+from base.models import Booking
+from myapp.custom_renderers import ORJSONRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        'Time rendering one booking history page with the stock JSONRenderer '
+        'and with ORJSONRenderer. Bookings come from the database, e.g. '
+        'after seed_load.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--iterations', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        bookings = list(
+            Booking.objects
+            .select_related('room', 'bookingtime')
+            .order_by('-created_at')[:options['page_size']]
+        )
+        if len(bookings) < options['page_size']:
+            raise CommandError(f'Need {options["page_size"]} bookings, run seed_load first')
+
+        request = APIRequestFactory().get('/api/bookings/history/')
+        data = {
+            'success': True,
+            'message': 'Data berhasil diambil',
+            'count': len(bookings),
+            'count_exact': True,
+            'next': None,
+            'previous': None,
+            'data': BookingHistorySerializer(bookings, many=True, context={'request': request}).data,
+        }
+
+        results = {}
+        for renderer in (JSONRenderer(), ORJSONRenderer()):
+            content = renderer.render(data)
+            start = time.perf_counter()
+            for _ in range(options['iterations']):
+                renderer.render(data)
+            elapsed = time.perf_counter() - start
+            results[type(renderer).__name__] = (elapsed / options['iterations'] * 1000, content)
+
+        (_, (before, expected)), (_, (after, content)) = results.items()
+        if json.loads(content) != json.loads(expected):
+            raise CommandError('ORJSONRenderer output differs from JSONRenderer')
+
+        for name, (elapsed, content) in results.items():
+            self.stdout.write(f'{name:<16}{elapsed:>10.3f} ms/page{len(content):>10} bytes')
+        self.stdout.write(self.style.SUCCESS(
+            f'{options["page_size"]} booking history items, {before / after:.1f}x faster render'
+        ))
@@ -0,0 +1,238 @@
+import time
+import random
+import datetime
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from account.models import User
+from base.models import Room
+
+
+STEPS = [
+    'login',
+    'validate',
+    'available',
+    'initialize',
+    'bookingmembers',
+    'create',
+    'history',
+    'change_booking_status',
+    'notifications',
+]
+
+
+class Conflict(Exception):
+    pass
+
+
+class Failure(Exception):
+    pass
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(percent / 100 * len(values)) - 1))
+    return values[index]
+
+
+class Flow:
+    """
+    One pass of the mobile booking flow for one user, every request is
+    timed under its step name.
+    """
+
+    def __init__(self, command, email, members, room_id, booking_date):
+        self.command = command
+        self.email = email
+        self.members = members
+        self.room_id = room_id
+        self.booking_date = booking_date
+        self.session = requests.Session()
+
+    def call(self, step, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.session.request(
+                method,
+                f'{self.command.base_url}/{path}',
+                timeout=self.command.timeout,
+                **kwargs,
+            )
+        except requests.RequestException as error:
+            self.command.record(step, time.perf_counter() - start, 'error')
+            raise Failure(f'{step}: {error}')
+
+        elapsed = time.perf_counter() - start
+        body = response.json() if response.headers.get('Content-Type', '').startswith('application/json') else {}
+        if response.status_code < 400:
+            self.command.record(step, elapsed, 'ok')
+            return body
+        if body.get('message') == 'Booking tidak tersedia':
+            self.command.record(step, elapsed, 'conflict')
+            raise Conflict(step)
+        self.command.record(step, elapsed, 'error')
+        raise Failure(f'{step}: {response.status_code} {body.get("message", response.text[:200])}')
+
+    def login(self, email):
+        body = self.call('login', 'post', 'account/users/login/', json={
+            'email': email,
+            'password': self.command.password,
+        })
+        return body['access']
+
+    def run(self):
+        token = self.login(self.email)
+        self.session.headers['Authorization'] = f'Bearer {token}'
+
+        self.call('validate', 'post', 'bookings/validate/')
+
+        body = self.call('available', 'get', 'bookingtimes/available/', params={
+            'date': self.booking_date,
+            'room_id': self.room_id,
+        })
+        available = [item['bookingtime_id'] for item in body['data'] if item['is_available']]
+        if not available:
+            raise Conflict('available')
+        bookingtime_ids = self.command.pick_bookingtimes(available, 2)
+
+        self.call('initialize', 'post', 'bookings/initialize/', json={
+            'room_id': self.room_id,
+            'booking_date': self.booking_date,
+            'bookingtime_id_list': bookingtime_ids,
+        })
+        for student_id_number in self.members:
+            self.call('bookingmembers', 'post', 'bookingmembers/', json={
+                'student_id_number': student_id_number,
+            })
+        self.call('create', 'post', 'bookings/', json={
+            'bookingtime_id_list': bookingtime_ids,
+            'booking_needs': 'Load test',
+        })
+
+        body = self.call('history', 'get', 'bookings/history/', params={'booking_status': 'pending'})
+        booking_id = body['data'][0]['booking_id']
+        self.call(
+            'change_booking_status', 'post', f'bookings/{booking_id}/change_booking_status/',
+            json={'booking_status': 'active'},
+            headers={'Authorization': f'Bearer {self.command.admin_token}'},
+        )
+
+        self.call('notifications', 'get', 'notifications/')
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay the mobile booking flow against a running server at a given '
+        'concurrency and report latency percentiles per step. Users come from '
+        'seed_load; run the server with FCM_ENABLED=False, MQTT_ENABLED=False '
+        'and a locmem/console EMAIL_BACKEND.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000/api')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the seed_load users to log in as')
+        parser.add_argument('--password', default='password123')
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--flows', type=int, default=100)
+        parser.add_argument('--rooms', type=int, default=5, help='Rooms to book, fewer rooms means more slot contention')
+        parser.add_argument('--days', type=int, default=3, help='Days to book, starting tomorrow')
+        parser.add_argument('--members', type=int, default=2, help='Members added to every booking')
+        parser.add_argument('--timeout', type=float, default=30)
+
+    def handle(self, *args, **options):
+        self.base_url = options['base_url'].rstrip('/')
+        self.password = options['password']
+        self.timeout = options['timeout']
+        self.rng = random.Random(options['seed'])
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.outcomes = defaultdict(lambda: defaultdict(int))
+
+        domain = f'@seed{options["seed"]}.uty.ac.id'
+        users = list(User.objects.filter(
+            email__endswith=domain,
+            is_admin=False,
+            verification_status='verified',
+            userprofile__isnull=False,
+        ).values_list('email', 'userprofile__student_id_number'))
+        admin = User.objects.filter(email__endswith=domain, is_admin=True).first()
+        rooms = list(Room.objects.order_by('room_id').values_list('room_id', flat=True)[:options['rooms']])
+        if not users or not admin or not rooms:
+            raise CommandError(f'No seed {options["seed"]} data, run seed_load first')
+
+        tomorrow = timezone.localdate() + datetime.timedelta(days=1)
+        dates = [str(tomorrow + datetime.timedelta(days=day)) for day in range(options['days'])]
+
+        self.admin_token = Flow(self, admin.email, [], None, None).login(admin.email)
+
+        flows = []
+        for _ in range(options['flows']):
+            (email, _), *members = self.rng.sample(users, options['members'] + 1)
+            flows.append(Flow(
+                self,
+                email,
+                [student_id_number for _, student_id_number in members],
+                self.rng.choice(rooms),
+                self.rng.choice(dates),
+            ))
+
+        results = defaultdict(int)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            for result in executor.map(self.run_flow, flows):
+                results[result] += 1
+        elapsed = time.perf_counter() - start
+
+        self.report(results, elapsed, options)
+
+    def run_flow(self, flow):
+        try:
+            flow.run()
+        except Conflict:
+            return 'conflict'
+        except Failure as error:
+            self.stderr.write(str(error))
+            return 'error'
+        return 'ok'
+
+    def pick_bookingtimes(self, values, count):
+        with self.lock:
+            return sorted(self.rng.sample(values, self.rng.randint(1, min(count, len(values)))))
+
+    def record(self, step, elapsed, outcome):
+        with self.lock:
+            self.latencies[step].append(elapsed * 1000)
+            self.outcomes[step][outcome] += 1
+
+    def report(self, results, elapsed, options):
+        requests_total = sum(len(values) for values in self.latencies.values())
+        self.stdout.write(
+            f'{options["flows"]} flows, concurrency {options["concurrency"]}, {elapsed:.1f}s'
+        )
+        self.stdout.write(
+            f'{sum(results.values()) / elapsed:.1f} flows/s, {requests_total / elapsed:.1f} requests/s'
+        )
+        self.stdout.write(
+            f'{"step":<24}{"count":>7}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"error %":>9}{"conflict %":>12}'
+        )
+        for step in STEPS:
+            outcomes = self.outcomes.get(step, {})
+            total = sum(outcomes.values())
+            if not total:
+                continue
+            p50, p95, p99 = (percentile(self.latencies[step], percent) for percent in (50, 95, 99))
+            self.stdout.write(
+                f'{step:<24}{total:>7}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}'
+                f'{outcomes.get("error", 0) / total * 100:>9.1f}{outcomes.get("conflict", 0) / total * 100:>12.1f}'
+            )
+
+        style = self.style.SUCCESS if not results['error'] else self.style.WARNING
+        self.stdout.write(style(
+            f'flows ok {results["ok"]}, conflict {results["conflict"]}, error {results["error"]}'
+        ))
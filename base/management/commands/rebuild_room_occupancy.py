@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from base.models import RoomOccupancy
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the room occupancy index from the pending/active bookings'
+
+    def handle(self, *args, **options):
+        RoomOccupancy.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Room occupancy rebuilt: {RoomOccupancy.objects.count()} entries'
+        ))
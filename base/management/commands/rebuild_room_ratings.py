@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from base.models import Room
+
+
+class Command(BaseCommand):
+    help = 'Recompute the rating sum, count, average and histogram of every room from the ratings'
+
+    def handle(self, *args, **options):
+        rooms = Room.rebuild_ratings()
+        self.stdout.write(self.style.SUCCESS(
+            f'Room ratings rebuilt: {len(rooms)} rooms'
+        ))
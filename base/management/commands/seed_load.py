@@ -0,0 +1,324 @@
+import time
+import uuid
+import random
+import datetime
+import itertools
+import contextlib
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from account.models import User, UserProfile
+from base.models import (
+    Booking,
+    BookingMember,
+    BookingTime,
+    Faculty,
+    Rating,
+    Room,
+    RoomFacility,
+    RoomImage,
+    RoomOccupancy,
+    StudyProgram,
+)
+from notification.models import Notification
+from myapp.my_utils import booking_code
+
+
+FACULTIES = {
+    'Sains dan Teknologi': ['Informatika', 'Sistem Informasi', 'Teknik Sipil', 'Arsitektur'],
+    'Bisnis dan Humaniora': ['Manajemen', 'Akuntansi', 'Ilmu Komunikasi', 'Psikologi'],
+    'Kesehatan': ['Farmasi', 'Kebidanan'],
+}
+# Bookings start here unless --start-date is given, so a seed gives the
+# same rows on any day
+START_DATE = datetime.date(2025, 1, 1)
+# The last days of the range are seeded as upcoming (pending/active)
+UPCOMING_DAYS = 30
+FACILITIES = ['AC', 'Proyektor', 'Papan Tulis', 'Wi-Fi', 'Smart TV', 'Sound System']
+PAST_STATUSES = ['completed', 'completed', 'completed', 'rejected', 'canceled', 'expired']
+FUTURE_STATUSES = ['pending', 'active', 'active', 'canceled']
+NOTIFICATIONS = [
+    ('Booking Diajukan', 'Booking anda sedang diproses', 'booking'),
+    ('Booking Diterima', 'Booking anda telah diterima', 'booking'),
+    ('Pengingat Booking', 'Booking anda akan dimulai 15 menit lagi', 'reminder'),
+    ('Artikel Baru', 'Baca artikel terbaru dari UTY Creative Hub', 'article'),
+]
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+@contextlib.contextmanager
+def keep_created_at(*models):
+    # bulk_create stamps auto_now_add fields with now(), let the generated
+    # created_at values through instead
+    fields = [model._meta.get_field('created_at') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the database with a deterministic, production sized dataset. '
+        'Rows are written with bulk_create (notifications with COPY), so no '
+        'signals, FCM pushes or celery tasks are fired. The dates start at '
+        '--start-date, not today; to put the upcoming bookings around today '
+        '(e.g. for load_booking_flow) pass today minus --days plus 30 days.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the generator, 0 or more')
+        parser.add_argument('--users', type=int, default=5000)
+        parser.add_argument('--rooms', type=int, default=30)
+        parser.add_argument(
+            '--start-date', type=datetime.date.fromisoformat, default=START_DATE,
+            help=f'First day of bookings, YYYY-MM-DD (default {START_DATE})',
+        )
+        parser.add_argument(
+            '--days', type=int, default=180,
+            help=f'Days of bookings, the last {UPCOMING_DAYS} of them are upcoming',
+        )
+        parser.add_argument('--fill', type=float, default=0.6, help='Share of room slots that get a booking')
+        parser.add_argument('--members', type=int, default=3, help='Maximum members per booking')
+        parser.add_argument('--notifications', type=int, default=1000000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--password', default='password123', help='Password of every generated user')
+
+    def handle(self, *args, **options):
+        self.seed = options['seed']
+        self.rng = random.Random(self.seed)
+        self.batch_size = options['batch_size']
+        self.domain = f'seed{options["seed"]}.uty.ac.id'
+
+        if self.seed < 0:
+            raise CommandError('--seed must be 0 or more')
+        if User.objects.filter(email__endswith=f'@{self.domain}').exists():
+            raise CommandError(f'Seed {options["seed"]} is already loaded, use another --seed')
+
+        self.start = options['start_date']
+        self.end = self.start + datetime.timedelta(days=options['days'])
+        self.today = self.end - datetime.timedelta(days=UPCOMING_DAYS)
+
+        with keep_created_at(User, Room, Booking, BookingMember, Rating):
+            self.step('faculties', self.seed_faculties)
+            self.step('users', self.seed_users, options['users'], options['password'])
+            self.step('rooms', self.seed_rooms, options['rooms'])
+            self.step('bookingtimes', self.seed_bookingtimes)
+            self.step('bookings', self.seed_bookings, options['fill'], options['members'])
+            self.step('notifications', self.seed_notifications, options['notifications'])
+
+        self.step('room occupancy', RoomOccupancy.rebuild)
+        self.step('room ratings', self.update_room_ratings)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seed {options["seed"]} loaded, users log in with *@{self.domain} / {options["password"]}'
+        ))
+
+    def step(self, name, function, *args):
+        start = time.perf_counter()
+        count = function(*args)
+        elapsed = time.perf_counter() - start
+        rows = f'{count} rows, ' if count is not None else ''
+        self.stdout.write(f'{name}: {rows}{elapsed:.1f}s')
+
+    def bulk_create(self, model, objects):
+        count = 0
+        for batch in batched(objects, self.batch_size):
+            model.objects.bulk_create(batch)
+            count += len(batch)
+        return count
+
+    def random_datetime(self, date):
+        return timezone.make_aware(datetime.datetime.combine(
+            date,
+            datetime.time(self.rng.randint(7, 20), self.rng.randint(0, 59), self.rng.randint(0, 59)),
+        ))
+
+    def seed_faculties(self):
+        # Shared by every seed, only the missing ones are created. Earlier
+        # versions created them on every run, the oldest copy is used
+        self.studyprograms = []
+        created = 0
+        for faculty_name, studyprogram_names in FACULTIES.items():
+            faculty = Faculty.objects.filter(faculty_name=faculty_name).order_by('pk').first()
+            if faculty is None:
+                faculty = Faculty.objects.create(faculty_name=faculty_name)
+                created += 1
+            for name in studyprogram_names:
+                studyprogram = faculty.studyprogram_set.filter(study_program_name=name).order_by('pk').first()
+                if studyprogram is None:
+                    studyprogram = StudyProgram.objects.create(study_program_name=name, faculty=faculty)
+                    created += 1
+                self.studyprograms.append(studyprogram)
+        return created
+
+    def seed_users(self, total, password):
+        # One hash shared by every user instead of hashing per user
+        password = make_password(password)
+        joined_from = self.start - datetime.timedelta(days=365)
+
+        self.users = [
+            User(
+                user_id=uuid.UUID(int=self.rng.getrandbits(128), version=4),
+                full_name=f'Mahasiswa {index}',
+                first_name='Mahasiswa',
+                email=f'user{index}@{self.domain}',
+                password=password,
+                is_active=True,
+                verification_status=self.rng.choice(['verified'] * 8 + ['unverified', 'suspend']),
+                created_at=self.random_datetime(
+                    joined_from + datetime.timedelta(days=self.rng.randrange(365))
+                ),
+            )
+            for index in range(total)
+        ]
+        self.users[0].is_admin = True
+        count = self.bulk_create(User, self.users)
+
+        count += self.bulk_create(UserProfile, (
+            UserProfile(
+                user=user,
+                student_id_number=f'52{self.seed:03}{index:07}',
+                birth_date=datetime.date(2000, 1, 1) + datetime.timedelta(days=self.rng.randrange(2000)),
+                whatsapp_number=f'08{self.rng.randrange(10 ** 10):010}',
+                faculty_id=studyprogram.faculty_id,
+                studyprogram=studyprogram,
+            )
+            for index, user in enumerate(self.users)
+            for studyprogram in [self.rng.choice(self.studyprograms)]
+        ))
+        return count
+
+    def seed_rooms(self, total):
+        self.rooms = Room.objects.bulk_create([
+            Room(
+                room_name=f'Ruang {index + 1}',
+                floor=index % 4 + 1,
+                room_type=self.rng.choice(['meeting', 'discussion', 'podcast']),
+                room_capacity=self.rng.choice([4, 6, 8, 12, 20]),
+                room_description='Ruangan untuk diskusi dan rapat mahasiswa',
+                created_at=self.random_datetime(self.start),
+            )
+            for index in range(total)
+        ])
+        images = self.bulk_create(RoomImage, (
+            RoomImage(room=room, room_image=f'room_images/meetingroom{index + 1}.jpeg')
+            for room in self.rooms
+            for index in range(self.rng.randint(1, 4))
+        ))
+        facilities = self.bulk_create(RoomFacility, (
+            RoomFacility(room=room, facility_name=name, facility_icon='facility_icons/air-conditioner-icon.png')
+            for room in self.rooms
+            for name in self.rng.sample(FACILITIES, self.rng.randint(2, len(FACILITIES)))
+        ))
+        return len(self.rooms) + images + facilities
+
+    def seed_bookingtimes(self):
+        self.bookingtimes = list(BookingTime.objects.order_by('start_time'))
+        if self.bookingtimes:
+            return 0
+        self.bookingtimes = BookingTime.objects.bulk_create([
+            BookingTime(
+                bookingtime_id=str(index + 1),
+                start_time=datetime.time(8 + index),
+                end_time=datetime.time(9 + index),
+            )
+            for index in range(9)
+        ])
+        BookingTime.cached.invalidate()
+        return len(self.bookingtimes)
+
+    def generate_bookings(self, fill):
+        day = self.start
+        while day <= self.end:
+            statuses = PAST_STATUSES if day < self.today else FUTURE_STATUSES
+            for room in self.rooms:
+                for bookingtime in self.bookingtimes:
+                    if self.rng.random() >= fill:
+                        continue
+                    yield Booking(
+                        booking_date=day,
+                        booking_status=self.rng.choice(statuses),
+                        booking_needs='Diskusi kelompok',
+                        bookingtime=bookingtime,
+                        room=room,
+                        user=self.rng.choice(self.users),
+                        created_at=self.random_datetime(day - datetime.timedelta(days=self.rng.randint(1, 14))),
+                    )
+            day += datetime.timedelta(days=1)
+
+    def seed_bookings(self, fill, max_members):
+        count = 0
+        for bookings in batched(self.generate_bookings(fill), self.batch_size):
+            for booking, pk in zip(bookings, Booking.reserve_ids(len(bookings))):
+                booking.id = pk
+                booking.booking_id = booking_code.encode(pk)
+                booking.is_rated = booking.booking_status == 'completed' and self.rng.random() < 0.4
+            Booking.objects.bulk_create(bookings)
+
+            members = [
+                BookingMember(booking=booking, user=user, created_at=booking.created_at)
+                for booking in bookings
+                for user in {booking.user, *self.rng.sample(self.users, self.rng.randint(0, max_members - 1))}
+            ]
+            BookingMember.objects.bulk_create(members)
+
+            ratings = [
+                Rating(
+                    booking=booking,
+                    rating_value=self.rng.choice([3, 4, 4, 5, 5]),
+                    comment=self.rng.choice([None, 'Ruangan nyaman', 'AC kurang dingin']),
+                    created_at=self.random_datetime(booking.booking_date),
+                )
+                for booking in bookings
+                if booking.is_rated
+            ]
+            Rating.objects.bulk_create(ratings)
+            count += len(bookings) + len(members) + len(ratings)
+        return count
+
+    def seed_notifications(self, total):
+        # Millions of rows, stream them with COPY instead of building a model
+        # instance and an INSERT parameter list per row
+        fields = [
+            Notification._meta.get_field(name)
+            for name in ['notification_title', 'notification_body', 'notification_type',
+                         'notification_topic', 'created_at', 'write', 'user']
+        ]
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+        table = connection.ops.quote_name(Notification._meta.db_table)
+
+        start = timezone.make_aware(datetime.datetime.combine(self.start, datetime.time()))
+        seconds = (self.end - self.start).days * 24 * 60 * 60
+        user_ids = [str(user.user_id) for user in self.users]
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            with cursor.copy(f'COPY {table} ({columns}) FROM STDIN') as copy:
+                for index in range(total):
+                    title, body, notification_type = self.rng.choice(NOTIFICATIONS)
+                    # Articles are broadcast to every user
+                    user_id = None if notification_type == 'article' else self.rng.choice(user_ids)
+                    copy.write_row((
+                        title,
+                        body,
+                        notification_type,
+                        user_id or 'article',
+                        start + datetime.timedelta(seconds=self.rng.randrange(seconds)),
+                        True,
+                        user_id,
+                    ))
+        return total
+
+    def update_room_ratings(self):
+        return len(Room.rebuild_ratings())
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_room_occupancy(apps, schema_editor):
+    Booking = apps.get_model('base', 'Booking')
+    BookingTime = apps.get_model('base', 'BookingTime')
+    RoomOccupancy = apps.get_model('base', 'RoomOccupancy')
+
+    bookingtime_ids = BookingTime.objects.values_list('bookingtime_id', flat=True)
+    bits = {
+        bookingtime_id: 1 << index
+        for index, bookingtime_id in enumerate(sorted(bookingtime_ids))
+    }
+    masks = {}
+    bookings = Booking.objects.filter(
+        booking_status__in=['pending', 'active'],
+        bookingtime__isnull=False,
+    ).values_list('room_id', 'booking_date', 'bookingtime_id')
+    for room_id, booking_date, bookingtime_id in bookings.iterator():
+        key = (room_id, booking_date)
+        masks[key] = masks.get(key, 0) | bits.get(bookingtime_id, 0)
+
+    RoomOccupancy.objects.bulk_create(
+        [
+            RoomOccupancy(room_id=room_id, booking_date=booking_date, slot_mask=mask)
+            for (room_id, booking_date), mask in masks.items()
+            if mask
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomOccupancy',
+            fields=[
+                ('roomoccupancy_id', models.AutoField(editable=False, primary_key=True, serialize=False, unique=True)),
+                ('booking_date', models.DateField()),
+                ('slot_mask', models.BigIntegerField(default=0)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='base.room')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='roomoccupancy',
+            constraint=models.UniqueConstraint(fields=('room', 'booking_date'), name='unique_room_occupancy'),
+        ),
+        migrations.RunPython(build_room_occupancy, migrations.RunPython.noop),
+    ]
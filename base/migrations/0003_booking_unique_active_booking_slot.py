@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:30
+
+import importlib
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+CANCELLATION_REASON = 'Dibatalkan otomatis: slot sudah dipesan booking lain'
+
+
+def cancel_duplicate_bookings(apps, schema_editor):
+    """
+    Before the constraint existed two requests could both book the same
+    slot. Keep the earliest pending/active booking of every slot and
+    cancel the later ones, listing them, so that the index can be built.
+    """
+    Booking = apps.get_model('base', 'Booking')
+    RoomOccupancy = apps.get_model('base', 'RoomOccupancy')
+
+    active = Booking.objects.filter(booking_status__in=['pending', 'active'], bookingtime__isnull=False)
+    slots = (
+        active.values('room_id', 'booking_date', 'bookingtime_id')
+        .annotate(total=Count('booking_id'))
+        .filter(total__gt=1)
+        .order_by()
+    )
+
+    canceled = []
+    for slot in slots:
+        bookings = active.filter(
+            room_id=slot['room_id'],
+            booking_date=slot['booking_date'],
+            bookingtime_id=slot['bookingtime_id'],
+        ).order_by('created_at', 'booking_id')
+        canceled += list(bookings.values_list('booking_id', flat=True)[1:])
+    if not canceled:
+        return
+
+    # update() sends no signals, nobody is notified by the migration
+    Booking.objects.filter(booking_id__in=canceled).update(
+        booking_status='canceled',
+        cancellation_reason=CANCELLATION_REASON,
+    )
+    print(f'\n  Canceled {len(canceled)} duplicate pending/active bookings: {", ".join(canceled)}')
+
+    RoomOccupancy.objects.all().delete()
+    importlib.import_module('base.migrations.0002_roomoccupancy').build_room_occupancy(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0002_roomoccupancy'),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_duplicate_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(condition=models.Q(('booking_status__in', ['pending', 'active'])), fields=('room', 'booking_date', 'bookingtime'), name='unique_active_booking_slot'),
+        ),
+    ]
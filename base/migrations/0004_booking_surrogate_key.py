@@ -0,0 +1,93 @@
+# Replaces the varchar Booking primary key ("UCH-XXXXXX") with a bigint
+# identity column. booking_id stays as a unique public code and every
+# foreign key to Booking is rewritten to the new column.
+
+from django.db import migrations, models
+
+
+REFERENCING_TABLES = ['base_bookingmember', 'base_rating', 'base_celerytask']
+
+
+def convert_booking_key(apps, schema_editor):
+    execute = schema_editor.execute
+    index_name = schema_editor._create_index_name
+
+    # The data updates below must not leave deferred FK checks behind,
+    # postgres refuses ALTER TABLE with pending trigger events
+    execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+    # Number the existing bookings in creation order
+    execute('ALTER TABLE base_booking ADD COLUMN id bigint')
+    execute(
+        'UPDATE base_booking SET id = numbered.number '
+        'FROM (SELECT booking_id, row_number() OVER (ORDER BY created_at, booking_id) AS number '
+        'FROM base_booking) AS numbered '
+        'WHERE base_booking.booking_id = numbered.booking_id'
+    )
+
+    # Point the referencing rows at the new id, dropping the varchar FKs
+    for table in REFERENCING_TABLES:
+        execute(f'ALTER TABLE {table} ADD COLUMN booking_ref bigint')
+        execute(
+            f'UPDATE {table} SET booking_ref = base_booking.id FROM base_booking '
+            f'WHERE {table}.booking_id = base_booking.booking_id'
+        )
+        execute(f'ALTER TABLE {table} DROP COLUMN booking_id')
+        execute(f'ALTER TABLE {table} RENAME COLUMN booking_ref TO booking_id')
+
+    # Swap the primary key, booking_id keeps its varchar_pattern_ops index
+    execute('ALTER TABLE base_booking DROP CONSTRAINT base_booking_pkey')
+    execute('ALTER TABLE base_booking ALTER COLUMN id SET NOT NULL')
+    execute('ALTER TABLE base_booking ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY')
+    execute(
+        "SELECT setval(pg_get_serial_sequence('base_booking', 'id'), COALESCE(MAX(id), 0) + 1, false) "
+        "FROM base_booking"
+    )
+    execute('ALTER TABLE base_booking ADD PRIMARY KEY (id)')
+    execute(
+        f'ALTER TABLE base_booking ADD CONSTRAINT {index_name("base_booking", ["booking_id"], suffix="_uniq")} '
+        f'UNIQUE (booking_id)'
+    )
+
+    # Recreate the foreign keys the way Django names them
+    for table in REFERENCING_TABLES:
+        if table == 'base_rating':
+            execute(
+                f'ALTER TABLE {table} ADD CONSTRAINT {index_name(table, ["booking_id"], suffix="_uniq")} '
+                f'UNIQUE (booking_id)'
+            )
+        else:
+            execute(f'ALTER TABLE {table} ALTER COLUMN booking_id SET NOT NULL')
+            execute(f'CREATE INDEX {index_name(table, ["booking_id"], suffix="")} ON {table} (booking_id)')
+        execute(
+            f'ALTER TABLE {table} ADD CONSTRAINT {index_name(table, ["booking_id"], suffix="_fk_base_booking_id")} '
+            f'FOREIGN KEY (booking_id) REFERENCES base_booking (id) DEFERRABLE INITIALLY DEFERRED'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0003_booking_unique_active_booking_slot'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(convert_booking_key),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='booking',
+                    name='id',
+                    field=models.BigAutoField(default=None, primary_key=True, serialize=False),
+                    preserve_default=False,
+                ),
+                migrations.AlterField(
+                    model_name='booking',
+                    name='booking_id',
+                    field=models.CharField(editable=False, max_length=10, unique=True),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0004_booking_surrogate_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'booking_status', '-created_at'], name='booking_history_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'booking_date', 'booking_status'], name='booking_scan_idx'),
+        ),
+    ]
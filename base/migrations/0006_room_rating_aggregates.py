@@ -0,0 +1,69 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:54
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def build_room_ratings(apps, schema_editor):
+    Rating = apps.get_model('base', 'Rating')
+    Room = apps.get_model('base', 'Room')
+
+    stars = {
+        'rating_1': Count('rating_id', filter=Q(rating_value__lt=2)),
+        'rating_2': Count('rating_id', filter=Q(rating_value__gte=2, rating_value__lt=3)),
+        'rating_3': Count('rating_id', filter=Q(rating_value__gte=3, rating_value__lt=4)),
+        'rating_4': Count('rating_id', filter=Q(rating_value__gte=4, rating_value__lt=5)),
+        'rating_5': Count('rating_id', filter=Q(rating_value__gte=5)),
+    }
+    aggregates = Rating.objects.values('booking__room').annotate(
+        rating_sum=Sum('rating_value'),
+        total_raters=Count('rating_id'),
+        **stars,
+    ).order_by()
+    for aggregate in aggregates:
+        room_id = aggregate.pop('booking__room')
+        if room_id is None:
+            continue
+        aggregate['room_rating'] = aggregate['rating_sum'] / aggregate['total_raters']
+        Room.objects.filter(pk=room_id).update(**aggregate)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0005_booking_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='rating_1',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='rating_2',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='rating_3',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='rating_4',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='rating_5',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='rating_sum',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.RunPython(build_room_ratings, migrations.RunPython.noop),
+    ]
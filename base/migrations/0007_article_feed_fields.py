@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:58
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+
+def build_article_feed_fields(apps, schema_editor):
+    Article = apps.get_model('base', 'Article')
+    ArticleImage = apps.get_model('base', 'ArticleImage')
+
+    articles = list(Article.objects.only('article_body'))
+    for article in articles:
+        article.article_excerpt = Truncator(strip_tags(article.article_body)).chars(200)
+    Article.objects.bulk_update(articles, ['article_excerpt'], batch_size=1000)
+
+    Article.objects.update(cover_image=Subquery(
+        ArticleImage.objects
+        .filter(article=OuterRef('pk'))
+        .order_by('articleimage_id')
+        .values('article_image')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0006_room_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='article_excerpt',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='cover_image',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='article_images'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['-created_at'], name='article_feed_idx'),
+        ),
+        migrations.RunPython(build_article_feed_fields, migrations.RunPython.noop),
+    ]
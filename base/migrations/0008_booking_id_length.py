@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0007_article_feed_fields'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='booking',
+            name='booking_id',
+            field=models.CharField(editable=False, max_length=19, unique=True),
+        ),
+    ]
@@ -1,20 +1,28 @@
-import uuid
 from django.utils import timezone
 from django.utils.formats import date_format
 from django.utils.translation import gettext as _
 from django.utils.timesince import timesince
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
 
-from django.db import models
+from django.db import models, transaction, connection
 from django.conf import settings
-from django.db.models.signals import post_save, pre_delete
+from django.core.exceptions import ValidationError
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.signals import post_save, pre_delete, post_delete
 from django.dispatch import receiver
 
+from myapp.my_utils import booking_code, cache_utils
+from myapp.my_utils.reference_cache import ReferenceCache
+
 
 class Faculty(models.Model):
     faculty_id = models.AutoField(primary_key=True, unique=True, editable=False)
     faculty_name = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    cached = ReferenceCache("faculties")
+
     def __str__(self):
         return self.faculty_name
 
@@ -26,6 +34,8 @@ class StudyProgram(models.Model):
     
     faculty = models.ForeignKey(Faculty, on_delete=models.CASCADE)
 
+    cached = ReferenceCache("studyprograms")
+
     def __str__(self):
         return self.study_program_name
 
@@ -42,9 +52,101 @@ class Room(models.Model):
     # Rating
     room_rating = models.FloatField(default=0.0)
     total_raters = models.IntegerField(default=0)
+    # Running sum and per star histogram, kept by the Rating signals
+    rating_sum = models.FloatField(default=0.0, editable=False)
+    rating_1 = models.IntegerField(default=0, editable=False)
+    rating_2 = models.IntegerField(default=0, editable=False)
+    rating_3 = models.IntegerField(default=0, editable=False)
+    rating_4 = models.IntegerField(default=0, editable=False)
+    rating_5 = models.IntegerField(default=0, editable=False)
+
+    STARS = range(1, 6)
 
     def __str__(self):
         return self.room_name
+
+    @classmethod
+    def rating_star(cls, rating_value):
+        # Histogram bucket of a rating, 4.5 counts as a 4
+        return min(max(int(rating_value), cls.STARS[0]), cls.STARS[-1])
+
+    @property
+    def rating_histogram(self):
+        return {str(star): getattr(self, f"rating_{star}") for star in self.STARS}
+
+    @staticmethod
+    def detail_version_name(room_id):
+        # Version of the cached detail payloads of the room
+        return f"room:{room_id}"
+
+    @classmethod
+    def invalidate_detail(cls, *room_ids):
+        names = [cls.detail_version_name(room_id) for room_id in room_ids]
+
+        def bump():
+            for name in names:
+                cache_utils.bump_version(name)
+
+        transaction.on_commit(bump)
+
+    @classmethod
+    def add_rating(cls, room_id, rating_value, sign=1):
+        # One UPDATE, every F() reads the row as it is before the update,
+        # so concurrent ratings can't overwrite each other
+        rating_sum = F("rating_sum") + sign * rating_value
+        total_raters = F("total_raters") + sign
+        star = f"rating_{cls.rating_star(rating_value)}"
+        cls.objects.filter(pk=room_id).update(
+            rating_sum=rating_sum,
+            total_raters=total_raters,
+            room_rating=Case(
+                # Removing the last rating
+                When(total_raters__lte=-sign, then=Value(0.0)),
+                default=rating_sum / total_raters,
+                output_field=models.FloatField(),
+            ),
+            **{star: F(star) + sign},
+        )
+        cls.invalidate_detail(room_id)
+
+    @classmethod
+    def rebuild_ratings(cls):
+        # Recompute every room from the ratings in one grouped query
+        stars = {}
+        for star in cls.STARS:
+            # Same buckets as rating_star()
+            condition = Q()
+            if star > cls.STARS[0]:
+                condition &= Q(rating_value__gte=star)
+            if star < cls.STARS[-1]:
+                condition &= Q(rating_value__lt=star + 1)
+            stars[f"rating_{star}"] = Count("rating_id", filter=condition)
+        aggregates = {
+            aggregate.pop("booking__room"): aggregate
+            for aggregate in Rating.objects.values("booking__room").annotate(
+                rating_sum=Sum("rating_value"),
+                total_raters=Count("rating_id"),
+                **stars,
+            ).order_by()
+        }
+
+        rooms = list(cls.objects.all())
+        for room in rooms:
+            aggregate = aggregates.get(room.pk, {})
+            room.rating_sum = aggregate.get("rating_sum") or 0.0
+            room.total_raters = aggregate.get("total_raters", 0)
+            room.room_rating = room.rating_sum / room.total_raters if room.total_raters else 0.0
+            for star in cls.STARS:
+                setattr(room, f"rating_{star}", aggregate.get(f"rating_{star}", 0))
+        cls.objects.bulk_update(
+            rooms,
+            ["rating_sum", "total_raters", "room_rating", *[f"rating_{star}" for star in cls.STARS]],
+            batch_size=1000,
+        )
+        # bulk_update sends no signals
+        transaction.on_commit(lambda: cache_utils.bump_version("rooms"))
+        cls.invalidate_detail(*[room.pk for room in rooms])
+        return rooms
     
 
 class RoomType(models.Model):
@@ -52,6 +154,8 @@ class RoomType(models.Model):
     room_type_name = models.CharField(max_length=30)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    cached = ReferenceCache("roomtypes")
+
     def __str__(self):
         return self.room_type_name
     
@@ -84,13 +188,45 @@ class BookingTime(models.Model):
     start_time = models.TimeField()
     end_time = models.TimeField()
 
+    cached = ReferenceCache("bookingtimes")
+
     def __str__(self):
         return self.start_time.strftime("%H:%M") + " - " + self.end_time.strftime("%H:%M")
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and BookingTime.objects.count() >= RoomOccupancy.MAX_SLOTS:
+            raise ValidationError(f"Booking time maksimal {RoomOccupancy.MAX_SLOTS}")
+        super().save(*args, **kwargs)
+
+    def has_started(self, date, now=None):
+        # A slot that already started on that date can not be booked anymore
+        start = timezone.make_aware(timezone.datetime.combine(date, self.start_time))
+        return start <= (now or timezone.now())
+
+    @classmethod
+    def by_start_time(cls):
+        # Cached slots in display order. The occupancy bits keep following
+        # bookingtime_id, see RoomOccupancy.slot_bits
+        return sorted(cls.cached.all().values(), key=lambda bookingtime: bookingtime.start_time)
+
 
 class Booking(models.Model):
     class Meta:
         ordering = ["-created_at"]
+        constraints = [
+            # A slot can only be held by one pending/active booking
+            models.UniqueConstraint(
+                fields=["room", "booking_date", "bookingtime"],
+                condition=models.Q(booking_status__in=["pending", "active"]),
+                name="unique_active_booking_slot",
+            ),
+        ]
+        indexes = [
+            # history: user + status, newest first
+            models.Index(fields=["user", "booking_status", "-created_at"], name="booking_history_idx"),
+            # scan: today's active booking of a user
+            models.Index(fields=["user", "booking_date", "booking_status"], name="booking_scan_idx"),
+        ]
 
     BOOKING_STATUS = (
         ("initiated", "Initiated"),
@@ -102,7 +238,12 @@ class Booking(models.Model):
         ("expired", "Expired"),
     )
 
-    booking_id = models.CharField(max_length=10, primary_key=True, unique=True, editable=False)
+    # Statuses that hold a slot in the room occupancy index
+    OCCUPYING_STATUS = ["pending", "active"]
+
+    id = models.BigAutoField(primary_key=True)
+    # "UCH-" and up to booking_code.MAX_LENGTH letters
+    booking_id = models.CharField(max_length=19, unique=True, editable=False)
     booking_date = models.DateField()
     booking_status = models.CharField(max_length=30, default="pending", choices=BOOKING_STATUS)
     booking_needs = models.TextField(null=True, blank=True)
@@ -118,14 +259,45 @@ class Booking(models.Model):
         return self.room.room_name
     
     def save(self, *args, **kwargs):
-        # Generate unique custom booking_id
-        if not self.booking_id:
-            custom_id = f'UCH-{uuid.uuid4().hex[:6].upper()}'
-            while Booking.objects.filter(booking_id=custom_id).exists():
-                custom_id = f'UCH-{uuid.uuid4().hex[:6].upper()}'
-            self.booking_id = custom_id
+        # Reserve the id up front so the public booking_id can be derived
+        if self._state.adding and not self.pk:
+            self.pk = Booking.reserve_ids(1)[0]
+            kwargs.setdefault("force_insert", True)
 
-        super().save(*args, **kwargs)
+        if not self.booking_id:
+            self.booking_id = booking_code.encode(self.pk)
+
+        # The occupancy index is written by the post_save signal, in the
+        # same transaction as the row. Deletes already run in one. No
+        # savepoint, callers that catch IntegrityError open their own
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def reserve_ids(cls, count):
+        # Draw ids from the primary key sequence, e.g. for bulk_create
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+                [cls._meta.db_table, count],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the slot held at load time so the occupancy index can be
+        # updated incrementally when the booking is saved or deleted
+        if not instance.get_deferred_fields():
+            instance._occupancy_key = instance.occupancy_key
+        return instance
+
+    # (room_id, booking_date, bookingtime_id) held by this booking, or None
+    @property
+    def occupancy_key(self):
+        if self.booking_status not in self.OCCUPYING_STATUS or not self.bookingtime_id:
+            return None
+        return (self.room_id, str(self.booking_date), self.bookingtime_id)
 
     # return True if booking is expired
     @property
@@ -136,10 +308,143 @@ class Booking(models.Model):
         return aware_date <= timezone.now()
     
     def reschedule(self, new_booking_date, new_bookingtime):
-        self.booking_date = new_booking_date
+        self.booking_date = self._meta.get_field("booking_date").to_python(new_booking_date)
         self.bookingtime = new_bookingtime
         self.booking_status = "active"
         self.save()
+
+
+class RoomOccupancy(models.Model):
+    """
+    Slots of a room that are held by pending/active bookings on a date,
+    stored as a bitmask over the BookingTime ids (see slot_bits).
+    """
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["room", "booking_date"], name="unique_room_occupancy"),
+        ]
+
+    # slot_mask is a signed bigint, bit 63 would overflow it
+    MAX_SLOTS = 63
+
+    roomoccupancy_id = models.AutoField(primary_key=True, unique=True, editable=False)
+    booking_date = models.DateField()
+    slot_mask = models.BigIntegerField(default=0)
+
+    room = models.ForeignKey(Room, on_delete=models.CASCADE)
+
+    def __str__(self):
+        return f"{self.room_id} - {self.booking_date}"
+
+    @staticmethod
+    def slot_bits(bookingtime_ids=None):
+        # Bit of every BookingTime, by position in bookingtime_id order
+        if bookingtime_ids is None:
+            bookingtime_ids = BookingTime.cached.all().keys()
+        if len(bookingtime_ids) > RoomOccupancy.MAX_SLOTS:
+            raise ValueError(f"slot_mask holds at most {RoomOccupancy.MAX_SLOTS} booking times")
+        return {
+            bookingtime_id: 1 << index
+            for index, bookingtime_id in enumerate(sorted(bookingtime_ids))
+        }
+
+    @classmethod
+    def get_mask(cls, room_id, booking_date):
+        mask = cls.objects.filter(
+            room_id=room_id,
+            booking_date=booking_date,
+        ).values_list("slot_mask", flat=True).first()
+        return mask or 0
+
+    @classmethod
+    def get_masks(cls, room_ids, start_date, end_date):
+        # {(room_id, booking_date): mask} for every occupied day in the range
+        entries = cls.objects.filter(
+            room_id__in=room_ids,
+            booking_date__range=(start_date, end_date),
+        ).exclude(slot_mask=0).values_list("room_id", "booking_date", "slot_mask")
+        return {(room_id, booking_date): mask for room_id, booking_date, mask in entries}
+
+    @classmethod
+    def occupied_bookingtime_ids(cls, room_id, booking_date, bookingtime_ids=None):
+        mask = cls.get_mask(room_id, booking_date)
+        if not mask:
+            return set()
+        return {
+            bookingtime_id
+            for bookingtime_id, bit in cls.slot_bits(bookingtime_ids).items()
+            if mask & bit
+        }
+
+    @classmethod
+    def mask_of(cls, bookingtime_ids, bits=None):
+        bits = cls.slot_bits() if bits is None else bits
+        mask = 0
+        for bookingtime_id in bookingtime_ids:
+            mask |= bits.get(bookingtime_id, 0)
+        return mask
+
+    @classmethod
+    def occupy(cls, room_id, booking_date, bookingtime_ids):
+        mask = cls.mask_of(bookingtime_ids)
+        if not mask:
+            return
+        cls.objects.get_or_create(room_id=room_id, booking_date=booking_date)
+        cls.objects.filter(room_id=room_id, booking_date=booking_date).update(
+            slot_mask=F("slot_mask").bitor(mask)
+        )
+
+    @classmethod
+    def release(cls, room_id, booking_date, bookingtime_ids):
+        mask = cls.mask_of(bookingtime_ids)
+        if not mask:
+            return
+        cls.objects.filter(room_id=room_id, booking_date=booking_date).update(
+            slot_mask=F("slot_mask").bitand(~mask)
+        )
+
+    @classmethod
+    def refresh(cls, room_id, booking_date):
+        # Recompute a single (room, date) entry from its bookings
+        bookingtime_ids = Booking.objects.filter(
+            room_id=room_id,
+            booking_date=booking_date,
+            booking_status__in=Booking.OCCUPYING_STATUS,
+        ).values_list("bookingtime_id", flat=True)
+        cls.objects.update_or_create(
+            room_id=room_id,
+            booking_date=booking_date,
+            defaults={"slot_mask": cls.mask_of(bookingtime_ids)},
+        )
+
+    @classmethod
+    def rebuild(cls):
+        # Recompute the whole index from the bookings
+        bits = cls.slot_bits()
+        masks = {}
+        with transaction.atomic():
+            # Booking writes update the index in their own transaction, so
+            # once the lock is held every committed booking is visible and
+            # later ones wait for the rebuild to finish
+            with connection.cursor() as cursor:
+                cursor.execute(f"LOCK TABLE {cls._meta.db_table} IN EXCLUSIVE MODE")
+            bookings = Booking.objects.filter(
+                booking_status__in=Booking.OCCUPYING_STATUS,
+                bookingtime__isnull=False,
+            ).values_list("room_id", "booking_date", "bookingtime_id")
+            for room_id, booking_date, bookingtime_id in bookings.iterator():
+                key = (room_id, booking_date)
+                masks[key] = masks.get(key, 0) | bits.get(bookingtime_id, 0)
+
+            cls.objects.all().delete()
+            cls.objects.bulk_create(
+                [
+                    cls(room_id=room_id, booking_date=booking_date, slot_mask=mask)
+                    for (room_id, booking_date), mask in masks.items()
+                    if mask
+                ],
+                batch_size=1000,
+            )
           
 
 class BookingMember(models.Model):
@@ -164,10 +469,20 @@ class Rating(models.Model):
     def __str__(self):
         return str(self.rating_id)
 
+    def save(self, *args, **kwargs):
+        # The room aggregates (post_save signal) commit together with the rating
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Article(models.Model):
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=['-created_at'], name='article_feed_idx'),
+        ]
+
+    EXCERPT_LENGTH = 200
         
     article_id = models.AutoField(primary_key=True, unique=True, editable=False)
     article_type = models.CharField(max_length=30)
@@ -176,8 +491,34 @@ class Article(models.Model):
     article_link = models.URLField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Feed fields, written on save so the list never reads the body or images
+    article_excerpt = models.CharField(max_length=255, blank=True, default='', editable=False)
+    cover_image = models.ImageField(upload_to="article_images", null=True, blank=True, editable=False)
+
     def __str__(self):
         return self.article_title
+
+    def save(self, *args, **kwargs):
+        self.article_excerpt = self.make_excerpt(self.article_body)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def make_excerpt(cls, body):
+        return Truncator(strip_tags(body)).chars(cls.EXCERPT_LENGTH)
+
+    @classmethod
+    def update_cover_images(cls, *article_ids):
+        """
+        Set cover_image to the first image of each article (all articles
+        when no id is given) in one UPDATE.
+        """
+        articles = cls.objects.filter(pk__in=article_ids) if article_ids else cls.objects.all()
+        return articles.update(cover_image=Subquery(
+            ArticleImage.objects
+            .filter(article=OuterRef('pk'))
+            .order_by('articleimage_id')
+            .values('article_image')[:1]
+        ))
     
     @property
     def time_since(self):
@@ -243,38 +584,89 @@ def create_bookingmember(sender, instance, created, **kwargs):
             booking=instance,
         )
 
+@receiver(post_save, sender=Booking)
+def update_room_occupancy(sender, instance, created, **kwargs):
+    if not created and not hasattr(instance, "_occupancy_key"):
+        # Loaded with deferred fields, the previous slot is unknown
+        RoomOccupancy.refresh(instance.room_id, instance.booking_date)
+    else:
+        old_key = None if created else instance._occupancy_key
+        new_key = instance.occupancy_key
+        if old_key != new_key:
+            if old_key:
+                RoomOccupancy.release(old_key[0], old_key[1], [old_key[2]])
+            if new_key:
+                RoomOccupancy.occupy(new_key[0], new_key[1], [new_key[2]])
+    instance._occupancy_key = instance.occupancy_key
+
+@receiver(post_delete, sender=Booking)
+def release_room_occupancy(sender, instance, **kwargs):
+    key = getattr(instance, "_occupancy_key", instance.occupancy_key)
+    if key:
+        RoomOccupancy.release(key[0], key[1], [key[2]])
+
+# Slot bits follow the bookingtime_id order, so adding or removing a
+# BookingTime moves them. Editing its times leaves them where they are
+@receiver(post_save, sender=BookingTime)
+@receiver(post_delete, sender=BookingTime)
+def rebuild_room_occupancy(sender, instance, created=True, **kwargs):
+    if created:
+        RoomOccupancy.rebuild()
+
 @receiver(post_save, sender=Rating)
 def update_room_rating(sender, instance, created, **kwargs):
     if created:
-        room = instance.booking.room
-        total_raters = room.total_raters
-        total_rating = room.room_rating * total_raters
-
-        total_rating += instance.rating_value
-        total_raters += 1
-
-        room.room_rating = total_rating / total_raters
-        room.total_raters = total_raters
-
+        Room.add_rating(instance.booking.room_id, instance.rating_value)
+        # update() skips the booking save signals, nothing else changes
+        Booking.objects.filter(pk=instance.booking_id).update(is_rated=True)
         instance.booking.is_rated = True
-        instance.booking.save()
-        room.save()
 
 @receiver(pre_delete, sender=Rating)
 def update_room_rating_delete(sender, instance, **kwargs):
-    room = instance.booking.room
-    total_raters = room.total_raters
-    total_rating = room.room_rating * total_raters
+    Room.add_rating(instance.booking.room_id, instance.rating_value, sign=-1)
 
-    total_rating -= instance.rating_value
-    total_raters -= 1
-
-    if total_raters <= 0:
-        room.room_rating = 0
-        room.total_raters = 0
-    else:
-        room.room_rating = total_rating / total_raters
-        room.total_raters = total_raters
-    room.save()
+    
 
-    
\ No newline at end of file
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+@receiver(post_save, sender=RoomImage)
+@receiver(post_delete, sender=RoomImage)
+@receiver(post_save, sender=RoomFacility)
+@receiver(post_delete, sender=RoomFacility)
+def invalidate_room_detail(sender, instance, **kwargs):
+    # Ratings invalidate it in Room.add_rating
+    Room.invalidate_detail(instance.pk if sender is Room else instance.room_id)
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def invalidate_article_cache(sender, instance, **kwargs):
+    transaction.on_commit(lambda: cache_utils.bump_version('articles'))
+
+@receiver(post_save, sender=ArticleImage)
+@receiver(post_delete, sender=ArticleImage)
+def update_article_cover_image(sender, instance, **kwargs):
+    Article.update_cover_images(instance.article_id)
+    transaction.on_commit(lambda: cache_utils.bump_version('articles'))
+
+# Version counters behind the ETags of the reference data endpoints (see
+# myapp.conditional_get) and the ReferenceCache tables
+REFERENCE_VERSIONS = {
+    Faculty: 'faculties',
+    StudyProgram: 'studyprograms',
+    BookingTime: 'bookingtimes',
+    RoomType: 'roomtypes',
+    Banner: 'banners',
+    Room: 'rooms',
+    RoomImage: 'rooms',
+    RoomFacility: 'rooms',
+    # Room.add_rating changes the room with update(), no Room signal
+    Rating: 'rooms',
+}
+
+def bump_reference_version(sender, instance, **kwargs):
+    name = REFERENCE_VERSIONS[sender]
+    transaction.on_commit(lambda: cache_utils.bump_version(name))
+
+for model in REFERENCE_VERSIONS:
+    post_save.connect(bump_reference_version, sender=model)
+    post_delete.connect(bump_reference_version, sender=model)
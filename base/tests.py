@@ -1,9 +1,29 @@
+import io
+import importlib
+import datetime
+from unittest import mock
+
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date, parse_http_date
 
 from rest_framework.test import APITestCase
 
-from base.models import Booking, Room
+from base.models import (
+    Article, ArticleImage, Booking, BookingMember, BookingTime, Faculty, Rating, Room, RoomFacility, RoomImage, RoomOccupancy,
+    StudyProgram,
+)
+from account.models import UserProfile
+from notification.models import Notification
 from account.models import User
+from myapp.my_utils import booking_code, reference_cache
 
 
 
@@ -52,4 +72,909 @@ from account.models import User
 #         }
 #         response = self.client.post(reverse('bookingmember-list'), data)
 #         print(response.data)
-#         self.assertEqual(response.status_code, 201)
\ No newline at end of file
+#         self.assertEqual(response.status_code, 201)
+
+class BookingTestCase(APITestCase):
+    """
+    A signed in user, a meeting room and `bookingtimes` hourly booking
+    times from 08:00 with ids '1', '2', ...
+    """
+    bookingtimes = 2
+
+    def setUp(self):
+        self.user = self.create_user()
+        self.room = Room.objects.create(
+            room_name='Meeting Room',
+            floor=1,
+            room_type='meeting',
+            room_capacity=8,
+        )
+        for index in range(1, self.bookingtimes + 1):
+            BookingTime.objects.create(
+                bookingtime_id=str(index),
+                start_time=datetime.time(7 + index),
+                end_time=datetime.time(8 + index),
+            )
+        self.client.force_authenticate(self.user)
+        # Query counts are for warm reference caches, as the next request
+        # finds them once the writes above are committed
+        reference_cache.next_generation()
+        for model in (Faculty, StudyProgram, BookingTime):
+            model.cached.all()
+
+    def create_user(self):
+        return User.objects.create_user(
+            email='booking@gmail.com',
+            password='test1234',
+            full_name='Test Booking',
+        )
+
+    def create_booking(self, bookingtime_id='1', booking_date='2030-01-01', booking_status='pending'):
+        return Booking.objects.create(
+            booking_date=booking_date,
+            booking_status=booking_status,
+            bookingtime_id=bookingtime_id,
+            user=self.user,
+            room=self.room,
+        )
+
+
+class TestRoomOccupancy(BookingTestCase):
+    bookingtimes = 4
+
+    @mock.patch('notification.models.messaging.send')
+    def test_index_follows_booking_status(self, messaging_send):
+        booking = self.create_booking('2')
+        self.create_booking('3', booking_status='initiated')
+        self.assertEqual(
+            RoomOccupancy.occupied_bookingtime_ids(self.room.room_id, '2030-01-01'),
+            {'2'},
+        )
+
+        booking = Booking.objects.get(booking_id=booking.booking_id)
+        booking.booking_status = 'canceled'
+        booking.save()
+        self.assertEqual(
+            RoomOccupancy.occupied_bookingtime_ids(self.room.room_id, '2030-01-01'),
+            set(),
+        )
+
+    def test_available_reads_index(self):
+        self.create_booking('1')
+        self.create_booking('4')
+
+        # Booking times come from BookingTime.cached
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('bookingtime-available'), {
+                'date': '2030-01-01',
+                'room_id': self.room.room_id,
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {item['bookingtime_id']: item['is_available'] for item in response.data['data']},
+            {'1': False, '2': True, '3': True, '4': False},
+        )
+
+    def test_slots_are_listed_by_start_time(self):
+        # Ten slots or more, bookingtime_id '10' sorts before '2'
+        for index in range(5, 12):
+            BookingTime.objects.create(
+                bookingtime_id=str(index),
+                start_time=datetime.time(7 + index),
+                end_time=datetime.time(8 + index),
+            )
+        self.create_booking('10')
+        ids = [str(index) for index in range(1, 12)]
+
+        response = self.client.get(reverse('bookingtime-available'), {
+            'date': '2030-01-01',
+            'room_id': self.room.room_id,
+        })
+        self.assertEqual([item['bookingtime_id'] for item in response.data['data']], ids)
+        self.assertEqual(
+            [item['bookingtime_id'] for item in response.data['data'] if not item['is_available']],
+            ['10'],
+        )
+
+        response = self.client.get(reverse('bookingtime-matrix'), {
+            'start_date': '2030-01-01',
+            'end_date': '2030-01-01',
+        })
+        self.assertEqual([item['bookingtime_id'] for item in response.data['data']['bookingtimes']], ids)
+        self.assertEqual(
+            response.data['data']['rooms'][0]['availability'],
+            {'2030-01-01': '11111111101'},
+        )
+
+    def test_available_and_matrix_agree_on_started_slots(self):
+        now = timezone.make_aware(datetime.datetime(2030, 1, 1, 10, 30))
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            availability = {}
+            for date in ('2029-12-31', '2030-01-01', '2030-01-02'):
+                response = self.client.get(reverse('bookingtime-available'), {
+                    'date': date,
+                    'room_id': self.room.room_id,
+                })
+                availability[date] = ''.join(
+                    '1' if item['is_available'] else '0' for item in response.data['data']
+                )
+            response = self.client.get(reverse('bookingtime-matrix'), {
+                'start_date': '2029-12-31',
+                'end_date': '2030-01-02',
+            })
+        self.assertEqual(availability, {
+            '2029-12-31': '0000',
+            '2030-01-01': '0001',
+            '2030-01-02': '1111',
+        })
+        self.assertEqual(response.data['data']['rooms'][0]['availability'], availability)
+
+        response = self.client.get(reverse('bookingtime-available'), {
+            'date': '01-01-2030',
+            'room_id': self.room.room_id,
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def test_slot_count_fits_the_mask(self):
+        # bulk_create skips save(), fill up to the limit
+        BookingTime.objects.bulk_create([
+            BookingTime(
+                bookingtime_id=str(index),
+                start_time=datetime.time(index % 24),
+                end_time=datetime.time(index % 24),
+            )
+            for index in range(5, RoomOccupancy.MAX_SLOTS + 1)
+        ])
+        BookingTime.cached.invalidate()
+        self.create_booking('63')
+        self.assertEqual(
+            RoomOccupancy.occupied_bookingtime_ids(self.room.room_id, '2030-01-01'),
+            {'63'},
+        )
+
+        with self.assertRaises(ValidationError):
+            BookingTime.objects.create(bookingtime_id='64', start_time=datetime.time(8), end_time=datetime.time(9))
+        response = self.client.post(reverse('bookingtime-list'), {
+            'bookingtime_id': '64',
+            'start_time': '08:00',
+            'end_time': '09:00',
+        })
+        self.assertEqual(response.status_code, 400)
+        with self.assertRaises(ValueError):
+            RoomOccupancy.slot_bits([str(index) for index in range(RoomOccupancy.MAX_SLOTS + 1)])
+
+    def test_only_added_or_removed_slots_rebuild_the_index(self):
+        with mock.patch.object(RoomOccupancy, 'rebuild') as rebuild:
+            bookingtime = BookingTime.objects.get(bookingtime_id='4')
+            bookingtime.end_time = datetime.time(12, 30)
+            bookingtime.save()
+            rebuild.assert_not_called()
+
+            BookingTime.objects.create(bookingtime_id='5', start_time=datetime.time(12), end_time=datetime.time(13))
+            bookingtime.delete()
+            self.assertEqual(rebuild.call_count, 2)
+
+    def test_rebuild_matches_incremental_index(self):
+        self.create_booking('1')
+        self.create_booking('3')
+        mask = RoomOccupancy.get_mask(self.room.room_id, '2030-01-01')
+
+        RoomOccupancy.rebuild()
+        self.assertEqual(RoomOccupancy.get_mask(self.room.room_id, '2030-01-01'), mask)
+
+    def test_matrix_encodes_rooms_days_and_slots(self):
+        other_room = Room.objects.create(
+            room_name='Studio',
+            floor=2,
+            room_type='studio',
+            room_capacity=4,
+        )
+        self.create_booking('2')
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('bookingtime-matrix'), {
+                'start_date': '2030-01-01',
+                'end_date': '2030-01-02',
+            })
+        self.assertEqual(response.status_code, 200)
+        rooms = {room['room_id']: room for room in response.data['data']['rooms']}
+        self.assertEqual(rooms[self.room.room_id]['availability'], {
+            '2030-01-01': '1011',
+            '2030-01-02': '1111',
+        })
+        self.assertEqual(rooms[other_room.room_id]['availability']['2030-01-01'], '1111')
+
+        response = self.client.get(reverse('bookingtime-matrix'), {
+            'start_date': '2000-01-01',
+            'end_date': '2000-01-01',
+            'floors': '2',
+        })
+        self.assertEqual(len(response.data['data']['rooms']), 1)
+        self.assertEqual(response.data['data']['rooms'][0]['availability'], {'2000-01-01': '0000'})
+
+
+class TestBookingSlotUniqueness(BookingTestCase):
+
+    def test_database_rejects_second_holder_of_a_slot(self):
+        self.create_booking('1')
+        self.create_booking('1', booking_status='canceled')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.create_booking('1', booking_status='active')
+
+    @mock.patch('base.api.views.booking_views.create_notification')
+    def test_reschedule_into_held_slot_is_rejected(self, create_notification):
+        self.create_booking('1')
+        booking = self.create_booking('2')
+
+        response = self.client.post(
+            reverse('booking-reschedule', args=[booking.booking_id]),
+            {'booking_date': '2030-01-01', 'bookingtime': '1'},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['message'], 'Booking tidak tersedia')
+        booking.refresh_from_db()
+        self.assertEqual(booking.bookingtime_id, '2')
+        self.assertEqual(booking.booking_status, 'pending')
+        create_notification.delay.assert_not_called()
+
+    @mock.patch('base.api.serializers.booking_serializers.create_notification')
+    def test_create_books_every_slot_in_bulk(self, create_notification):
+        member = User.objects.create_user(
+            email='member@gmail.com',
+            password='test1234',
+            full_name='Test Member',
+        )
+        bookinginit = self.create_booking(None, booking_status='initiated')
+        BookingMember.objects.create(booking=bookinginit, user=member)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('booking-list'), {
+                'bookingtime_id_list': '["1", "2"]',
+                'booking_needs': 'Rapat',
+            })
+        self.assertEqual(response.status_code, 200)
+
+        bookings = Booking.objects.filter(user=self.user, booking_status='pending')
+        self.assertEqual(bookings.count(), 2)
+        self.assertFalse(Booking.objects.filter(booking_status='initiated').exists())
+        self.assertEqual(
+            BookingMember.objects.filter(booking__in=bookings).count(),
+            4,
+        )
+        self.assertEqual(
+            RoomOccupancy.occupied_bookingtime_ids(self.room.room_id, '2030-01-01'),
+            {'1', '2'},
+        )
+        create_notification.delay.assert_called_once()
+
+    def test_create_rejects_held_slot_without_partial_write(self):
+        self.create_booking('2')
+        self.create_booking(None, booking_status='initiated')
+
+        response = self.client.post(reverse('booking-list'), {
+            'bookingtime_id_list': '["1", "2"]',
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['message'], 'Booking tidak tersedia')
+        self.assertEqual(Booking.objects.filter(booking_status='pending').count(), 1)
+        self.assertTrue(Booking.objects.filter(booking_status='initiated').exists())
+
+    def test_migration_cancels_later_duplicates(self):
+        migration = importlib.import_module('base.migrations.0003_booking_unique_active_booking_slot')
+        # The state the migration meets on a database without the index
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX unique_active_booking_slot')
+        first = self.create_booking('1')
+        later = [self.create_booking('1'), self.create_booking('1', booking_status='active')]
+        other = self.create_booking('2')
+        RoomOccupancy.objects.all().delete()
+
+        with mock.patch('builtins.print'):
+            migration.cancel_duplicate_bookings(django_apps, None)
+
+        self.assertEqual(
+            dict(Booking.objects.values_list('booking_id', 'booking_status')),
+            {
+                first.booking_id: 'pending',
+                later[0].booking_id: 'canceled',
+                later[1].booking_id: 'canceled',
+                other.booking_id: 'pending',
+            },
+        )
+        self.assertEqual(
+            RoomOccupancy.occupied_bookingtime_ids(self.room.room_id, '2030-01-01'),
+            {'1', '2'},
+        )
+
+
+class TestBookingQueries(BookingTestCase):
+    def setUp(self):
+        self.faculty = Faculty.objects.create(faculty_name='Sains dan Teknologi')
+        self.studyprogram = StudyProgram.objects.create(
+            study_program_name='Informatika',
+            faculty=self.faculty,
+        )
+        super().setUp()
+        RoomImage.objects.create(room=self.room, room_image='room_images/room.jpeg')
+
+    def create_user(self, index=0):
+        user = User.objects.create(
+            email=f'member{index}@gmail.com',
+            full_name=f'Member {index}',
+            verification_status='verified',
+        )
+        UserProfile.objects.create(
+            user=user,
+            student_id_number=f'52104111{index:02}',
+            birth_date='2000-01-01',
+            whatsapp_number='088888888',
+            faculty=self.faculty,
+            studyprogram=self.studyprogram,
+        )
+        return user
+
+    def test_status_change_leaves_the_user_row_alone(self):
+        booking = self.create_booking()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('booking-change-booking-status', args=[booking.booking_id]),
+                {'booking_status': 'rejected'},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in queries if query['sql'].startswith('UPDATE "account_user"')])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.verification_status, 'verified')
+
+    def test_detail_query_count_does_not_grow_with_members(self):
+        booking = self.create_booking()
+        url = reverse('booking-detail', args=[booking.booking_id])
+
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['data']['bookingmember']), 1)
+
+        for index in range(1, 7):
+            BookingMember.objects.create(booking=booking, user=self.create_user(index))
+
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        members = response.data['data']['bookingmember']
+        self.assertEqual(len(members), 7)
+        self.assertEqual(members[6]['user']['userprofile']['studyprogram'], 'Informatika')
+        self.assertEqual(members[6]['user']['userprofile']['faculty'], 'Sains dan Teknologi')
+        self.assertEqual(response.data['data']['room']['room_images'][0]['room_image'], 'http://testserver/media/room_images/room.jpeg')
+
+
+    def test_history_and_list_query_count_does_not_grow_with_bookings(self):
+        def fetch():
+            with CaptureQueriesContext(connection) as queries:
+                history = self.client.get(reverse('booking-history'), {'booking_status': 'pending'})
+                listing = self.client.get(reverse('booking-list'))
+            self.assertEqual(history.status_code, 200)
+            self.assertEqual(listing.status_code, 200)
+            return len(queries), history.data
+
+        self.create_booking(booking_date='2030-01-07')
+        expected, history = fetch()
+        self.assertEqual(history['data'][0]['booking_day'], 'Senin')
+
+        for day in range(1, 10):
+            self.create_booking(bookingtime_id=str(day % 2 + 1), booking_date=f'2030-01-{day:02}')
+        queries, history = fetch()
+        self.assertEqual(queries, expected)
+        self.assertEqual(history['count'], 10)
+        days = {booking['booking_date']: booking['booking_day'] for booking in history['data']}
+        self.assertEqual(days['2030-01-05'], 'Sabtu')
+        self.assertEqual(days['2030-01-06'], 'Minggu')
+        self.assertEqual(history['data'][0]['room'], {'room_name': 'Meeting Room'})
+        self.assertEqual(history['data'][0]['bookingtime']['start_time'], '09:00')
+
+    @mock.patch('myapp.custom_pagination.ESTIMATE_MIN_ROWS', 0)
+    def test_unfiltered_list_uses_planner_estimate(self):
+        for day in range(1, 11):
+            self.create_booking(booking_date=f'2030-01-{day:02}')
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE base_booking')
+
+        response = self.client.get(reverse('booking-list'), {'page_size': 4})
+        self.assertEqual((response.data['count'], response.data['count_exact']), (10, False))
+        response = self.client.get(reverse('booking-list'), {'page_size': 4, 'page': 3})
+        self.assertEqual(len(response.data['data']), 2)
+        response = self.client.get(reverse('booking-list'), {'page_size': 4, 'page': 4})
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.get(reverse('booking-list'), {'booking_status': 'pending'})
+        self.assertEqual((response.data['count'], response.data['count_exact']), (10, True))
+
+    def test_history_cursor_pages_newest_first(self):
+        bookings = [
+            self.create_booking(bookingtime_id=str(day % 2 + 1), booking_date=f'2030-01-{day:02}')
+            for day in range(1, 11)
+        ]
+        response = self.client.get(
+            reverse('booking-history'),
+            {'booking_status': 'pending', 'pagination': 'cursor', 'page_size': 4},
+        )
+        codes = [booking['booking_id'] for booking in response.data['data']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            codes += [booking['booking_id'] for booking in response.data['data']]
+        self.assertEqual(codes, [booking.booking_id for booking in reversed(bookings)])
+
+
+    def test_history_fields_trim_columns_and_method_fields(self):
+        self.create_booking()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('booking-history'),
+                {'booking_status': 'pending', 'fields': 'booking_id,booking_day,room'},
+            )
+        self.assertEqual(set(response.data['data'][0]), {'booking_id', 'booking_day', 'room'})
+        self.assertEqual(response.data['data'][0]['booking_day'], 'Selasa')
+        select = [query['sql'] for query in queries if 'FROM "base_booking"' in query['sql']][-1]
+        self.assertIn('"base_booking"."booking_date"', select)
+        self.assertNotIn('"base_booking"."booking_needs"', select)
+
+    def test_omit_skips_prefetched_method_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('room-list'))
+        with self.assertNumQueries(len(queries) - 1):
+            response = self.client.get(reverse('room-list'), {'omit': 'roomimages,room_description'})
+        self.assertNotIn('roomimages', response.data['data'][0])
+        self.assertNotIn('room_description', response.data['data'][0])
+        self.assertIn('room_name', response.data['data'][0])
+
+    def test_user_list_fields_with_joined_profile(self):
+        self.user.is_admin = True
+        self.user.save()
+        response = self.client.get(reverse('user-list'), {'fields': 'email,userprofile'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['data'][0]), {'email', 'userprofile'})
+        self.assertEqual(response.data['data'][0]['userprofile']['student_id_number'], '5210411100')
+
+        url = reverse('booking-detail', args=[self.create_booking().booking_id])
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'fields': 'booking_id,user'})
+        self.assertEqual(response.data['data']['user']['userprofile']['faculty'], 'Sains dan Teknologi')
+
+
+class TestRoomQueries(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(email='room@gmail.com', full_name='Test Room')
+        self.client.force_authenticate(self.user)
+
+    def create_room(self, images=3):
+        room = Room.objects.create(
+            room_name='Meeting Room',
+            floor=1,
+            room_type='meeting',
+            room_capacity=8,
+        )
+        for index in range(images):
+            RoomImage.objects.create(room=room, room_image=f'room_images/room{room.room_id}-{index}.jpeg')
+        RoomFacility.objects.create(room=room, facility_name='AC', facility_icon='facility_icons/ac.png')
+        return room
+
+    def test_list_query_count_does_not_grow_with_rooms(self):
+        self.create_room()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('room-list'))
+        expected = len(queries)
+
+        rooms = [self.create_room() for _ in range(5)]
+        with self.assertNumQueries(expected):
+            response = self.client.get(reverse('room-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['data']), 6)
+        self.assertTrue(all(len(room['roomimages']) == 3 for room in response.data['data']))
+
+        room = rooms[0]
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('room-detail', args=[room.room_id]))
+        self.assertEqual(len(response.data['data']['roomimages']), 3)
+        self.assertEqual(response.data['data']['facilities'][0]['facility_name'], 'AC')
+
+    def test_detail_payload_is_cached_until_the_room_changes(self):
+        room = self.create_room()
+        other_room = self.create_room()
+        url = reverse('room-detail', args=[room.room_id])
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+            self.client.get(url, {'x': '1'})
+        self.assertEqual(len(response.data['data']['facilities']), 1)
+        # Another fieldset is another payload
+        with self.assertNumQueries(2):
+            self.client.get(url, {'fields': 'room_name,facilities'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            RoomFacility.objects.create(room=room, facility_name='Proyektor', facility_icon='facility_icons/p.png')
+            RoomFacility.objects.create(room=other_room, facility_name='Proyektor', facility_icon='facility_icons/p.png')
+        response = self.client.get(url)
+        self.assertEqual(len(response.data['data']['facilities']), 2)
+
+        BookingTime.objects.create(bookingtime_id='1', start_time=datetime.time(8), end_time=datetime.time(9))
+        booking = Booking.objects.create(
+            booking_date='2030-01-01',
+            booking_status='completed',
+            bookingtime_id='1',
+            user=self.user,
+            room=room,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Rating.objects.create(booking=booking, rating_value=5)
+        response = self.client.get(url)
+        self.assertEqual(response.data['data']['rating_summary']['count'], 1)
+
+        self.assertEqual(self.client.get(reverse('room-detail', args=[0])).status_code, 404)
+
+    def test_list_first_image_only(self):
+        rooms = [self.create_room(images=images) for images in (3, 1, 0)]
+
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('room-list'), {'first_image': 'true'})
+        images = {room['room_id']: room['roomimages'] for room in response.data['data']}
+        first = rooms[0].roomimage_set.order_by('roomimage_id').first()
+        self.assertEqual([image['roomimage_id'] for image in images[rooms[0].room_id]], [first.roomimage_id])
+        self.assertEqual(len(images[rooms[1].room_id]), 1)
+        self.assertEqual(images[rooms[2].room_id], [])
+
+
+    def rate(self, room, rating_values):
+        BookingTime.objects.get_or_create(bookingtime_id='1', start_time=datetime.time(8), end_time=datetime.time(9))
+        ratings = []
+        for rating_value in rating_values:
+            rater = User.objects.create(email=f'rater{User.objects.count()}@gmail.com', full_name='Rater')
+            booking = Booking.objects.create(
+                booking_date='2030-01-01',
+                booking_status='completed',
+                bookingtime_id='1',
+                user=rater,
+                room=room,
+            )
+            ratings.append(Rating.objects.create(booking=booking, rating_value=rating_value))
+        return ratings
+
+    def test_rating_aggregates_follow_ratings_and_rebuild(self):
+        room = self.create_room()
+        ratings = self.rate(room, [5, 4, 4, 1.5])
+        self.assertTrue(Booking.objects.get(pk=ratings[0].booking.pk).is_rated)
+
+        room.refresh_from_db()
+        self.assertEqual((room.total_raters, room.rating_sum, room.room_rating), (4, 14.5, 3.625))
+        self.assertEqual(room.rating_histogram, {'1': 1, '2': 0, '3': 0, '4': 2, '5': 1})
+
+        ratings[0].delete()
+        room.refresh_from_db()
+        self.assertEqual((room.total_raters, room.rating_sum), (3, 9.5))
+        self.assertEqual(room.rating_histogram, {'1': 1, '2': 0, '3': 0, '4': 2, '5': 0})
+
+        Room.objects.filter(pk=room.pk).update(total_raters=0, room_rating=0, rating_sum=0, rating_4=7)
+        call_command('rebuild_room_ratings', stdout=io.StringIO())
+        room.refresh_from_db()
+        self.assertEqual((room.total_raters, room.rating_sum), (3, 9.5))
+        self.assertAlmostEqual(room.room_rating, 9.5 / 3)
+        self.assertEqual(room.rating_histogram, {'1': 1, '2': 0, '3': 0, '4': 2, '5': 0})
+
+        for rating in ratings[1:]:
+            rating.delete()
+        room.refresh_from_db()
+        self.assertEqual((room.total_raters, room.room_rating), (0, 0))
+
+    def test_detail_summary_and_paginated_ratings(self):
+        room = self.create_room()
+        BookingTime.objects.create(bookingtime_id='1', start_time=datetime.time(8), end_time=datetime.time(9))
+        for day, rating_value in enumerate([5, 5, 4, 2, 5], start=1):
+            raters = User.objects.create(email=f'rater{day}@gmail.com', full_name=f'Rater {day}')
+            booking = Booking.objects.create(
+                booking_date=f'2030-01-{day:02}',
+                booking_status='completed',
+                bookingtime_id='1',
+                user=raters,
+                room=room,
+            )
+            Rating.objects.create(booking=booking, rating_value=rating_value)
+
+        response = self.client.get(reverse('room-detail', args=[room.room_id]))
+        self.assertNotIn('ratings', response.data['data'])
+        self.assertEqual(response.data['data']['rating_summary'], {
+            'average': 4.2,
+            'count': 5,
+            'histogram': {'1': 0, '2': 1, '3': 0, '4': 1, '5': 3},
+        })
+
+        url = reverse('room-ratings', args=[room.room_id])
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'page_size': 3})
+        self.assertEqual(
+            [rating['user'] for rating in response.data['data']],
+            ['Rater 5', 'Rater 4', 'Rater 3'],
+        )
+        response = self.client.get(response.data['next'])
+        self.assertEqual(
+            [rating['user'] for rating in response.data['data']],
+            ['Rater 2', 'Rater 1'],
+        )
+        self.assertIsNone(response.data['next'])
+
+
+class TestArticleFeed(APITestCase):
+    def setUp(self):
+        cache.clear()
+        # New articles are broadcast over FCM
+        patcher = mock.patch('notification.models.messaging.send')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create(email='article@gmail.com', full_name='Test Article')
+        self.client.force_authenticate(self.user)
+
+    def create_article(self, images=2):
+        with self.captureOnCommitCallbacks(execute=True):
+            article = Article.objects.create(
+                article_type='news',
+                article_title='Article',
+                article_body='<p>Lorem ipsum dolor sit amet.</p> ' * 40,
+            )
+            for index in range(images):
+                ArticleImage.objects.create(article=article, article_image=f'article_images/article{index}.jpeg')
+        return article
+
+    def test_list_reads_feed_fields_and_caches_pages(self):
+        article = self.create_article()
+        for _ in range(4):
+            self.create_article(images=0)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('article-list'))
+        items = {item['article_id']: item for item in response.data['data']}
+        self.assertTrue(items[article.article_id]['image'].endswith('/article_images/article0.jpeg'))
+        self.assertNotIn('article_body', items[article.article_id])
+        self.assertEqual(len(items[article.article_id]['article_excerpt']), Article.EXCERPT_LENGTH)
+        self.assertNotIn('<p>', items[article.article_id]['article_excerpt'])
+        self.assertEqual(sum(item['image'] is None for item in items.values()), 4)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(reverse('article-list'))
+        self.assertEqual(cached.data, response.data)
+        # Parameters the view does not read share the page
+        with self.assertNumQueries(0):
+            self.client.get(reverse('article-list'), {'x': '1'})
+        with self.assertNumQueries(2):
+            self.client.get(reverse('article-list'), {'page_size': '2', 'fields': 'article_id'})
+        with self.assertNumQueries(0):
+            self.client.get(reverse('article-list') + '?fields=article_id&page_size=2')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            article.articleimage_set.order_by('articleimage_id').first().delete()
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('article-list'))
+        items = {item['article_id']: item for item in response.data['data']}
+        self.assertTrue(items[article.article_id]['image'].endswith('/article_images/article1.jpeg'))
+
+    def test_detail_is_cached_until_the_article_changes(self):
+        article = self.create_article()
+        url = reverse('article-detail', args=[article.article_id])
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['data']['images']), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            article.article_title = 'Updated'
+            article.save()
+        response = self.client.get(url)
+        self.assertEqual(response.data['data']['article_title'], 'Updated')
+
+
+class TestConditionalGet(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.faculty = Faculty.objects.create(faculty_name='Sains dan Teknologi')
+
+    def test_faculties_answer_matching_etag_without_queries(self):
+        response = self.client.get(reverse('faculty-list'))
+        etag = response['ETag']
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('faculty-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Faculty.objects.create(faculty_name='Kesehatan')
+        response = self.client.get(reverse('faculty-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.data['data']), 2)
+
+    def test_etag_covers_query_and_media_type(self):
+        url = reverse('faculty-list')
+        etag = self.client.get(url, {'fields': 'faculty_name'})['ETag']
+
+        self.assertEqual(self.client.get(url, {'fields': 'faculty_name'}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        for params, accept in (({}, 'application/json'), ({'fields': 'faculty_id'}, 'application/json'), ({'fields': 'faculty_name'}, 'text/html')):
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT=accept)
+            self.assertNotEqual(response.status_code, 304)
+
+    def test_if_modified_since(self):
+        response = self.client.get(reverse('faculty-list'))
+        last_modified = response['Last-Modified']
+
+        response = self.client.get(reverse('faculty-list'), HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+        earlier = http_date(parse_http_date(last_modified) - 3600)
+        response = self.client.get(reverse('faculty-list'), HTTP_IF_MODIFIED_SINCE=earlier)
+        self.assertEqual(response.status_code, 200)
+        # If-None-Match wins over If-Modified-Since
+        response = self.client.get(
+            reverse('faculty-list'),
+            HTTP_IF_MODIFIED_SINCE=last_modified,
+            HTTP_IF_NONE_MATCH='"stale"',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_room_etag_follows_images_and_ratings(self):
+        user = User.objects.create(email='etag@gmail.com', full_name='Test Etag')
+        self.client.force_authenticate(user)
+        room = Room.objects.create(room_name='Meeting Room', floor=1, room_type='meeting', room_capacity=8)
+        url = reverse('room-detail', args=[room.room_id])
+
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # Actions outside list/retrieve carry no ETag
+        self.assertFalse(self.client.get(reverse('room-ratings', args=[room.room_id])).has_header('ETag'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            RoomImage.objects.create(room=room, room_image='room_images/room.jpeg')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        BookingTime.objects.create(bookingtime_id='1', start_time=datetime.time(8), end_time=datetime.time(9))
+        booking = Booking.objects.create(
+            booking_date='2030-01-01',
+            booking_status='completed',
+            bookingtime_id='1',
+            user=user,
+            room=room,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Rating.objects.create(booking=booking, rating_value=4)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['rating_summary']['count'], 1)
+
+
+class TestBookingCode(SimpleTestCase):
+    def test_codes_round_trip_and_never_look_like_legacy_codes(self):
+        codes = {booking_code.encode(number) for number in range(5000)}
+        self.assertEqual(len(codes), 5000)
+        for number in (0, 1, 4999, booking_code.SPACE - 1):
+            self.assertEqual(booking_code.decode(booking_code.encode(number)), number)
+        for code in codes:
+            self.assertRegex(code, r'^UCH-[G-Z]{6}$')
+
+    def test_codes_grow_past_six_letters(self):
+        for number in (booking_code.SPACE, booking_code.SPACE + 1, 2 ** 63 - 1):
+            code = booking_code.encode(number)
+            self.assertRegex(code, r'^UCH-[G-Z]{7,15}$')
+            self.assertEqual(booking_code.decode(code), number)
+        self.assertEqual(len(booking_code.encode(booking_code.SPACE)), len('UCH-') + 7)
+        self.assertLessEqual(
+            len(booking_code.encode(2 ** 63 - 1)),
+            Booking._meta.get_field('booking_id').max_length,
+        )
+        with self.assertRaises(ValueError):
+            booking_code.encode(booking_code.LIMIT)
+
+
+class TestBookingIndexes(APITestCase):
+    def setUp(self):
+        self.users = User.objects.bulk_create([
+            User(email=f'index{index}@gmail.com', full_name=f'Test Index {index}')
+            for index in range(20)
+        ])
+        self.rooms = [
+            Room.objects.create(
+                room_name=f'Meeting Room {index}',
+                floor=1,
+                room_type='meeting',
+                room_capacity=8,
+            )
+            for index in range(20)
+        ]
+        BookingTime.objects.create(
+            bookingtime_id='1',
+            start_time=datetime.time(8),
+            end_time=datetime.time(9),
+        )
+
+        statuses = ['completed', 'canceled', 'rejected', 'expired', 'active']
+        start = datetime.date(2030, 1, 1)
+        ids = Booking.reserve_ids(2000)
+        Booking.objects.bulk_create([
+            Booking(
+                id=pk,
+                booking_id=booking_code.encode(pk),
+                booking_date=start + datetime.timedelta(days=index // 20),
+                booking_status=statuses[index % len(statuses)],
+                bookingtime_id='1',
+                user=self.users[index % len(self.users)],
+                room=self.rooms[index % len(self.rooms)],
+            )
+            for index, pk in enumerate(ids)
+        ])
+
+    def assertUsesIndex(self, queryset, index_name):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE base_booking')
+        self.assertIn(index_name, queryset.explain())
+
+    def test_history_uses_history_index(self):
+        self.assertUsesIndex(
+            Booking.objects.filter(booking_status='completed', user=self.users[0])[:10],
+            'booking_history_idx',
+        )
+
+    def test_scan_uses_scan_index(self):
+        self.assertUsesIndex(
+            Booking.objects.filter(
+                user=self.users[0],
+                booking_date=datetime.date(2030, 1, 1),
+                booking_status='active',
+            ).order_by('bookingtime__start_time'),
+            'booking_scan_idx',
+        )
+
+
+class TestSeedLoad(APITestCase):
+    def seed_load(self, **options):
+        call_command(
+            'seed_load', users=50, rooms=3, days=20, notifications=500,
+            batch_size=100, stdout=io.StringIO(), **options,
+        )
+
+    def test_seed_is_deterministic_and_consistent(self):
+        self.seed_load(seed=1)
+
+        self.assertEqual(User.objects.count(), 50)
+        self.assertEqual(Notification.objects.count(), 500)
+        self.assertFalse(Booking.objects.filter(bookingmember__isnull=True).exists())
+        self.assertEqual(
+            Rating.objects.count(),
+            Booking.objects.filter(is_rated=True).count(),
+        )
+        for booking in Booking.objects.filter(booking_status__in=Booking.OCCUPYING_STATUS)[:20]:
+            self.assertIn(
+                booking.bookingtime_id,
+                RoomOccupancy.occupied_bookingtime_ids(booking.room_id, booking.booking_date),
+            )
+        bookings = list(Booking.objects.order_by('id').values_list('booking_date', 'booking_status', 'user__email'))
+
+        with self.assertRaises(CommandError):
+            self.seed_load(seed=1)
+
+        Booking.objects.all().delete()
+        User.objects.all().delete()
+        Room.objects.all().delete()
+        # On another day too
+        later = timezone.now() + datetime.timedelta(days=40)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            self.seed_load(seed=1)
+        self.assertEqual(
+            list(Booking.objects.order_by('id').values_list('booking_date', 'booking_status', 'user__email')),
+            bookings,
+        )
+        self.assertEqual(bookings[0][0], datetime.date(2025, 1, 1))
+
+        # Reference tables are shared, seeds of any size add none
+        self.seed_load(seed=5000, start_date=datetime.date(2030, 1, 1))
+        self.assertEqual(Faculty.objects.count(), 3)
+        self.assertEqual(StudyProgram.objects.count(), 10)
+        self.assertEqual(User.objects.count(), 100)
@@ -0,0 +1,67 @@
+import hashlib
+
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from myapp.my_utils import cache_utils
+
+
+class NotModified(Exception):
+    pass
+
+
+class ConditionalGetMixin:
+    """
+    ETag and Last-Modified for list and retrieve, derived from the cache
+    version counters in etag_versions (bumped by the model signals). The
+    ETag also covers the query string and the negotiated media type, the
+    body depends on both. A matching If-None-Match, or without one an
+    If-Modified-Since no older than the last write, is answered with 304
+    right after authentication, before any query or serializer runs.
+
+    Only for views whose output changes with their tables alone, nothing
+    time-relative.
+    """
+    etag_versions = []
+    etag_actions = ['list', 'retrieve']
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        self.etag = None
+        if request.method not in ('GET', 'HEAD') or self.action not in self.etag_actions:
+            return
+
+        versions = [cache_utils.get_version(name) for name in self.etag_versions]
+        query = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+        )
+        digest = hashlib.md5(repr((query, request.accepted_media_type)).encode()).hexdigest()
+        self.etag = '"{}-{}"'.format('-'.join(str(version) for version in versions), digest)
+        self.last_modified = max(cache_utils.get_last_modified(name) for name in self.etag_versions)
+
+        if 'If-None-Match' in request.headers:
+            if self.etag in parse_etags(request.headers['If-None-Match']):
+                raise NotModified()
+            return
+        modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        if modified_since is not None and int(self.last_modified) <= modified_since:
+            raise NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'etag', None) and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = self.etag
+            response['Last-Modified'] = http_date(self.last_modified)
+            # Cache, but revalidate on every use
+            response['Cache-Control'] = 'no-cache'
+        return response
@@ -1,16 +1,237 @@
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 
+from myapp.my_utils import cache_utils
+
+
+# Below this many rows the planner estimate is not worth its error
+ESTIMATE_MIN_ROWS = 10000
+
+
+def estimate_count(model):
+    # reltuples is kept by ANALYZE/autovacuum, -1 when never analyzed
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    return int(row[0]) if row else -1
+
+
+class CountedPaginator(Paginator):
+    """
+    Paginator whose count follows the view's count_strategy:
+
+    exact      COUNT(*) on every request
+    cached     COUNT(*) cached per query for PAGINATION_COUNT_CACHE_TIMEOUT,
+               dropped when the model's count version is bumped on write
+    estimated  the planner's row estimate for unfiltered lists, exact
+               otherwise
+
+    count_exact tells whether the count was computed for this request.
+    Pages past an inexact count are still served.
+    """
+
+    def __init__(self, object_list, per_page, count_strategy='exact', **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_strategy = count_strategy
+        self.count_exact = True
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if self.count_strategy == 'estimated' and not queryset.query.where:
+            estimate = estimate_count(queryset.model)
+            if estimate >= ESTIMATE_MIN_ROWS:
+                self.count_exact = False
+                return estimate
+
+        if self.count_strategy == 'cached':
+            key = cache_utils.make_key(cache_utils.count_version_name(queryset.model), queryset.query)
+            count = cache.get(key)
+            if count is not None:
+                self.count_exact = False
+                return count
+            count = queryset.count()
+            cache.set(key, count, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+            return count
+
+        return queryset.count()
+
+    def validate_number(self, number):
+        self.count  # settles count_exact
+        if self.count_exact:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if self.count_exact:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        page = self._get_page(list(self.object_list[bottom:bottom + self.per_page]), number, self)
+        if number > 1 and not page.object_list:
+            raise EmptyPage('That page contains no results')
+        return page
+
+
 class CustomPaginationSerializer(pagination.PageNumberPagination):
+    """
+    Page number pagination. Views that set cursor_ordering can also be
+    paged by cursor: the first page is requested with ?pagination=cursor
+    and the next/previous links carry ?cursor=. Cursor pages skip the
+    COUNT and the OFFSET, so they cost the same at any depth.
+
+    Views set count_strategy ('exact', 'cached' or 'estimated', see
+    CountedPaginator) to make the page count cheaper on large tables.
+    """
     page_size = 100
     page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def django_paginator_class(self, queryset, page_size):
+        return CountedPaginator(queryset, page_size, count_strategy=self.count_strategy)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering and self.cursor_requested(request):
+            self.cursor_paginator = CustomCursorPagination()
+            self.cursor_paginator.ordering = ordering
+            # No view, the cursor order is fixed and ignores ?ordering=
+            return self.cursor_paginator.paginate_queryset(queryset, request)
+        self.count_strategy = getattr(view, 'count_strategy', 'exact')
+        return super().paginate_queryset(queryset, request, view)
+
+    def cursor_requested(self, request):
+        return (
+            request.query_params.get('pagination') == 'cursor'
+            or CustomCursorPagination.cursor_query_param in request.query_params
+        )
 
     def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
         return Response({
             'success': True,
             'message': 'Data berhasil diambil',
             'count': self.page.paginator.count,
+            'count_exact': self.page.paginator.count_exact,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'data': data
+        })
+
+
+class CustomCursorPagination(pagination.CursorPagination):
+    """
+    Keyset pagination on the whole ordering, e.g. (created_at, pk). DRF's
+    cursor keeps only ordering[0] and an offset into its ties, which turns
+    into offset scans when many rows share a created_at (bulk inserts) and
+    can skip or repeat rows at the page boundaries. Here the cursor holds
+    the values of every ordering column of the last row and the next page
+    starts strictly after them with a row value comparison,
+    (created_at, id) < (%s, %s), so the ordering must be unique and go
+    one way.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    # pk breaks created_at ties, e.g. rows from one bulk insert
+    ordering = ('-created_at', '-pk')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        descending = {name.startswith('-') for name in self.ordering}
+        assert len(descending) == 1, 'Keyset ordering must go one way'
+        self.fields = [
+            queryset.model._meta.pk if name.lstrip('-') == 'pk' else queryset.model._meta.get_field(name.lstrip('-'))
+            for name in self.ordering
+        ]
+
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor.reverse if self.cursor else False
+        position = self.decode_position(self.cursor.position) if self.cursor else None
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [name[1:] if name.startswith('-') else '-' + name for name in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            # After the position in the order read, before it when reversed
+            after = descending == {True}
+            if reverse:
+                after = not after
+            columns = ', '.join(
+                f'{connection.ops.quote_name(queryset.model._meta.db_table)}.{connection.ops.quote_name(field.column)}'
+                for field in self.fields
+            )
+            marks = ', '.join(['%s'] * len(self.fields))
+            queryset = queryset.extra(where=[f"({columns}) {'<' if after else '>'} ({marks})"], params=position)
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        if self.page:
+            self.previous_position = self.encode_position(self.page[0])
+            self.next_position = self.encode_position(self.page[-1])
+        else:
+            self.previous_position = self.next_position = self.cursor.position if self.cursor else None
+        return self.page
+
+    def encode_position(self, instance):
+        return json.dumps([field.value_to_string(instance) for field in self.fields])
+
+    def decode_position(self, position):
+        try:
+            values = json.loads(position)
+            if len(values) != len(self.fields):
+                raise ValueError
+            return [field.to_python(value) for field, value in zip(self.fields, values)]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(pagination.Cursor(offset=0, reverse=False, position=self.next_position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(pagination.Cursor(offset=0, reverse=True, position=self.previous_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'success': True,
+            'message': 'Data berhasil diambil',
             'next': self.get_next_link(),
             'previous': self.get_previous_link(),
-            'data': data  
+            'data': data
         })
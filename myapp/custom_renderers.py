@@ -0,0 +1,44 @@
+import math
+
+import orjson
+
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer on orjson. Dates, times, decimals, lazy translation
+    strings and anything else orjson does not know go through DRF's
+    JSONEncoder, so the output matches the stock renderer.
+
+    orjson writes NaN and Infinity as null. Under STRICT_JSON the stock
+    renderer raises ValueError on them instead, and so does this one: the
+    data is checked for them when the output has a null.
+    """
+    encoder = JSONEncoder()
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        options = self.options
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            options |= orjson.OPT_INDENT_2
+
+        content = orjson.dumps(data, default=self.encoder.default, option=options)
+        if self.strict and b'null' in content and has_non_finite(data):
+            raise ValueError('Out of range float values are not JSON compliant')
+        return content
+
+
+def has_non_finite(data):
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        return any(has_non_finite(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(has_non_finite(value) for value in data)
+    return False
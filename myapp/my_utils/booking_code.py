@@ -0,0 +1,61 @@
+"""
+Public booking codes ("UCH-XXXXXX") derived from the Booking primary key.
+
+The key is scrambled with an affine permutation and written in base 20 over
+letters that are not hex digits, so a code can never match one of the
+legacy random "UCH-<hex>" codes and no uniqueness probe is needed.
+
+Codes grow with the key: the first SPACE keys get 6 letters, the next
+20^7 get 7, and so on up to MAX_LENGTH letters, which covers every
+positive bigint. Each length permutes its own range, so codes of
+different lengths never collide and issued codes never change.
+"""
+
+PREFIX = 'UCH-'
+ALPHABET = 'GHIJKLMNOPQRSTUVWXYZ'
+LENGTH = 6
+MAX_LENGTH = 15
+SPACE = len(ALPHABET) ** LENGTH
+
+# MULTIPLIER must be coprime with every 20^length (2 and 5) to be reversible
+MULTIPLIER = 39916801
+OFFSET = 12345678
+
+# length: (first number, size of its range)
+TIERS = {}
+_start = 0
+for _length in range(LENGTH, MAX_LENGTH + 1):
+    TIERS[_length] = (_start, len(ALPHABET) ** _length)
+    _start += len(ALPHABET) ** _length
+# Numbers from LIMIT on have no code
+LIMIT = _start
+
+
+def encode(number):
+    if not 0 <= number < LIMIT:
+        raise ValueError(f'Booking number {number} is out of range')
+
+    for length, (start, size) in TIERS.items():
+        if number < start + size:
+            break
+    value = ((number - start) * MULTIPLIER + OFFSET) % size
+    chars = []
+    for _ in range(length):
+        value, index = divmod(value, len(ALPHABET))
+        chars.append(ALPHABET[index])
+    return PREFIX + ''.join(reversed(chars))
+
+
+def decode(code):
+    length = len(code) - len(PREFIX)
+    if not code.startswith(PREFIX) or length not in TIERS:
+        raise ValueError(f'Invalid booking code {code}')
+
+    value = 0
+    for char in code[len(PREFIX):]:
+        index = ALPHABET.find(char)
+        if index < 0:
+            raise ValueError(f'Invalid booking code {code}')
+        value = value * len(ALPHABET) + index
+    start, size = TIERS[length]
+    return start + (value - OFFSET) * pow(MULTIPLIER, -1, size) % size
@@ -0,0 +1,115 @@
+"""
+Version counters for cached responses.
+
+Every cached resource has a counter in the cache and its keys embed the
+current value, so bumping the counter drops every cached entry of that
+resource at once without knowing their keys. Stale entries simply expire.
+"""
+import time
+import hashlib
+
+from django.core.cache import cache
+
+
+# Seconds a single-flight lock is held at most, and waited for
+LOCK_TIMEOUT = 5
+LOCK_POLL_INTERVAL = 0.05
+
+
+def version_key(name):
+    return f'version:{name}'
+
+
+def get_version(name):
+    version = cache.get(version_key(name))
+    if version is None:
+        # Start from the clock, a counter evicted from the cache must not
+        # come back with a value that old entries were stored under
+        cache.add(version_key(name), time.time_ns(), None)
+        version = cache.get(version_key(name))
+    return version
+
+
+def modified_key(name):
+    return f'modified:{name}'
+
+
+def bump_version(name):
+    cache.set(modified_key(name), time.time(), None)
+    try:
+        return cache.incr(version_key(name))
+    except ValueError:
+        version = time.time_ns()
+        cache.set(version_key(name), version, None)
+        return version
+
+
+def get_last_modified(name):
+    """
+    Timestamp of the last bump, the first read when the resource was never
+    bumped since the cache was emptied.
+    """
+    modified = cache.get(modified_key(name))
+    if modified is None:
+        cache.add(modified_key(name), time.time(), None)
+        modified = cache.get(modified_key(name))
+    return modified
+
+
+def count_version_name(model):
+    # Bumped on writes to the model, drops its cached page counts
+    return f'count:{model._meta.label_lower}'
+
+
+def make_key(name, *parts):
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'{name}:{get_version(name)}:{digest}'
+
+
+def request_parts(request, params):
+    """
+    make_key parts for a request: scheme and host, which the absolute links
+    in a payload are built from, and the values of the query parameters in
+    params, sorted. Parameters the view does not read are left out, they
+    must not create new entries.
+    """
+    query = sorted(
+        (name, request.query_params.getlist(name))
+        for name in params
+        if name in request.query_params
+    )
+    return request.scheme, request.get_host(), query
+
+
+def get_or_set_once(key, compute, timeout):
+    """
+    cache.get_or_set that runs compute() once per miss: the caller that
+    takes the lock computes and stores the value, concurrent callers wait
+    for it instead of all computing it. When the holder fails (compute()
+    raised) or takes longer than LOCK_TIMEOUT the waiters compute it
+    themselves. compute() must not return None.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock = f'lock:{key}'
+    if cache.add(lock, 1, LOCK_TIMEOUT):
+        try:
+            value = compute()
+            cache.set(key, value, timeout)
+        finally:
+            cache.delete(lock)
+        return value
+
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        # The holder stores the value before it releases the lock
+        released = cache.get(lock) is None
+        value = cache.get(key)
+        if value is not None:
+            return value
+        if released:
+            break
+    return compute()
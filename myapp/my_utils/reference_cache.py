@@ -0,0 +1,160 @@
+"""
+Read-through cache of small, almost static tables (faculties, study
+programs, booking times, room types).
+
+Two tiers: an LRU in every worker process in front of the shared cache
+(Redis in production). Both hold the whole table as {pk: instance} under
+the table's version counter from cache_utils, which the model signals bump
+on every write and again on commit. A worker compares its copy with the
+shared counter once per request, and every CHECK_INTERVAL seconds in long
+running code such as celery tasks, so a write made by any worker is picked
+up by the next request of every other worker.
+
+The instances are shared, callers must not modify them.
+"""
+import time
+import threading
+
+from cachetools import LRUCache
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.signals import request_started
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+
+from myapp.my_utils import cache_utils
+
+
+CHECK_INTERVAL = 5
+
+local = LRUCache(maxsize=32)
+lock = threading.Lock()
+# Moves on every request, entries checked in an older one are checked again
+generation = 0
+
+# Per thread, the tables written in the transaction that is still open
+dirty = threading.local()
+
+
+def next_generation(**kwargs):
+    global generation
+    generation += 1
+    # A request starts outside any transaction
+    dirty.tables = set()
+
+
+request_started.connect(next_generation)
+
+
+class Entry:
+    def __init__(self, version, objects):
+        self.version = version
+        self.objects = objects
+        self.touch()
+
+    def touch(self):
+        self.generation = generation
+        self.checked_at = time.monotonic()
+
+    def is_fresh(self):
+        return self.generation == generation and time.monotonic() - self.checked_at < CHECK_INTERVAL
+
+
+class ReferenceCache:
+    """
+    Model attribute, e.g. `cached = ReferenceCache('faculties')` on
+    Faculty, then Faculty.cached.get(faculty_id) or Faculty.cached.all().
+    The name is the cache_utils version counter of the table.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __set_name__(self, model, attr):
+        self.model = model
+        post_save.connect(self.written, sender=model, weak=False)
+        post_delete.connect(self.written, sender=model, weak=False)
+
+    def written(self, **kwargs):
+        # Right away too, a request may have cached the old rows meanwhile
+        # when the commit comes
+        self.invalidate()
+        if connection.in_atomic_block:
+            # Until the commit this thread reads the table from the database,
+            # its uncommitted rows must not reach the cache
+            dirty.tables = getattr(dirty, 'tables', set()) | {self.name}
+            transaction.on_commit(self.invalidate)
+
+    def is_dirty(self):
+        if self.name not in getattr(dirty, 'tables', ()):
+            return False
+        if connection.in_atomic_block:
+            return True
+        # Rolled back, a commit runs invalidate()
+        dirty.tables.discard(self.name)
+        return False
+
+    def invalidate(self):
+        """
+        Drop the table from both tiers, e.g. after bulk_create or update()
+        which send no signals.
+        """
+        with lock:
+            local.pop(self.name, None)
+        cache_utils.bump_version(self.name)
+        getattr(dirty, 'tables', set()).discard(self.name)
+
+    def all(self):
+        if self.is_dirty():
+            return {obj.pk: obj for obj in self.model._default_manager.order_by('pk')}
+
+        with lock:
+            entry = local.get(self.name)
+        if entry is not None and entry.is_fresh():
+            return entry.objects
+
+        version = cache_utils.get_version(self.name)
+        if entry is not None and entry.version == version:
+            entry.touch()
+            return entry.objects
+
+        key = f'reference:{self.name}:{version}'
+        objects = cache.get(key)
+        if objects is None:
+            objects = {obj.pk: obj for obj in self.model._default_manager.order_by('pk')}
+            cache.set(key, objects, settings.REFERENCE_CACHE_TIMEOUT)
+
+        with lock:
+            local[self.name] = Entry(version, objects)
+        return objects
+
+    def get(self, pk):
+        """
+        Instance with that pk, None when there is none. A pk missing from
+        the cached table, e.g. a row committed after this request checked
+        the version, is looked up in the database.
+        """
+        try:
+            pk = self.model._meta.pk.to_python(pk)
+        except ValidationError:
+            return None
+        obj = self.all().get(pk)
+        if obj is None:
+            obj = self.model._default_manager.filter(pk=pk).first()
+        return obj
+
+    def attach(self, objects, field_name):
+        """
+        Set the foreign key field_name of every object from the cache, in
+        place of select_related. Objects that deferred the column are left
+        alone.
+        """
+        for obj in objects:
+            field = obj._meta.get_field(field_name)
+            if field.attname in obj.get_deferred_fields():
+                continue
+            pk = getattr(obj, field.attname)
+            if pk is not None:
+                field.set_cached_value(obj, self.get(pk))
+        return objects
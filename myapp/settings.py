@@ -60,7 +60,7 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'account.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -72,6 +72,14 @@ REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': 'myapp.custom_exception_handler.custom_exception_handler',
     'DEFAULT_PAGINATION_CLASS': 'myapp.custom_pagination.CustomPaginationSerializer',
     'DATETIME_FORMAT': '%Y-%m-%d %H:%M:%S',
+    'DEFAULT_RENDERER_CLASSES': [
+        'myapp.custom_renderers.ORJSONRenderer',
+    ] + (['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),
+    'DEFAULT_PARSER_CLASSES': [
+        'myapp.custom_parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 SIMPLE_JWT = {
@@ -86,7 +94,7 @@ SIMPLE_JWT = {
     "VERIFYING_KEY": "",
     "AUDIENCE": None,
     "ISSUER": None,
-    "JSON_ENCODER": None,
+    "JSON_ENCODER": "django.core.serializers.json.DjangoJSONEncoder",
     "JWK_URL": None,
     "LEEWAY": 0,
 
@@ -166,6 +174,34 @@ DATABASES = {
 # }
 
 
+# Cache
+# Redis when CACHE_LOCATION is set (see .env.dev), otherwise a per process
+# LocMemCache, which only keeps a single worker consistent
+CACHE_LOCATION = os.environ.get('CACHE_LOCATION')
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', (
+            'django.core.cache.backends.redis.RedisCache' if CACHE_LOCATION
+            else 'django.core.cache.backends.locmem.LocMemCache'
+        )),
+        'LOCATION': CACHE_LOCATION or '',
+    }
+}
+# Seconds a rendered article feed page is served from the cache, bounds
+# how stale time_since can get
+ARTICLE_CACHE_TIMEOUT = int(os.environ.get('ARTICLE_CACHE_TIMEOUT', 60))
+# Seconds a page count of a count_strategy = 'cached' view is reused
+PAGINATION_COUNT_CACHE_TIMEOUT = int(os.environ.get('PAGINATION_COUNT_CACHE_TIMEOUT', 300))
+# Seconds a table of myapp.my_utils.reference_cache stays in the shared
+# cache, writes replace it sooner through its version counter
+REFERENCE_CACHE_TIMEOUT = int(os.environ.get('REFERENCE_CACHE_TIMEOUT', 3600))
+# Seconds a room detail payload is cached, writes to the room replace it sooner
+ROOM_CACHE_TIMEOUT = int(os.environ.get('ROOM_CACHE_TIMEOUT', 3600))
+# Seconds a worker authenticates a token's user without reading it, see
+# account.authentication
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get('AUTH_USER_CACHE_TIMEOUT', 30))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -233,8 +269,12 @@ CELERY_TIMEZONE = os.environ.get('CELERY_TIMEZONE', 'Asia/Jakarta')
 cred = credentials.Certificate(
     BASE_DIR / "uty-creative-hub-45348-firebase-adminsdk-7fh42-34a16a5e10.json")
 firebase_admin.initialize_app(cred)
+# False logs pushes instead of sending them, e.g. for local load tests
+FCM_ENABLED = os.environ.get('FCM_ENABLED', 'True') == 'True'
 
 # MQTT Configurations
 MQTT_SERVER = os.environ.get('MQTT_SERVER', 'localhost')
 MQTT_PORT = int(os.environ.get('MQTT_PORT', 1883))
 MQTT_TOPIC = os.environ.get('MQTT_TOPIC', 'uch/pintu')
+# False logs door messages instead of publishing them
+MQTT_ENABLED = os.environ.get('MQTT_ENABLED', 'True') == 'True'
@@ -0,0 +1,116 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+
+
+class SparseFieldsetMixin:
+    """
+    Sparse fieldsets for GET requests: ?fields=a,b keeps only those top
+    level fields of every item, ?omit=a,b drops them. Dropped fields are
+    removed from the serializer, so their SerializerMethodFields never
+    run, and the queryset is trimmed with only() to the columns the kept
+    fields read.
+
+    Fields whose source is not a model column (SerializerMethodField,
+    properties) load the whole row, unless the serializer lists the
+    columns they read in Meta.sparse_sources, e.g.
+    {'booking_day': ['booking_date'], 'roomimages': []}.
+    """
+
+    def get_sparse_fields(self):
+        """
+        Names of the serializer fields to keep, None when the request asks
+        for every field.
+        """
+        if hasattr(self, '_sparse_fields'):
+            return self._sparse_fields
+
+        self._sparse_fields = None
+        if self.request is None or self.request.method not in ('GET', 'HEAD'):
+            return None
+
+        params = self.request.query_params
+        fields = {name.strip() for name in params.get('fields', '').split(',') if name.strip()}
+        omit = {name.strip() for name in params.get('omit', '').split(',') if name.strip()}
+        if fields or omit:
+            names = self.get_serializer_class()(context=self.get_serializer_context()).fields.keys()
+            self._sparse_fields = {
+                name for name in names
+                if (not fields or name in fields) and name not in omit
+            }
+        return self._sparse_fields
+
+    def sparse_field_requested(self, name):
+        """
+        For get_queryset, e.g. to skip a prefetch only a dropped field reads.
+        """
+        keep = self.get_sparse_fields()
+        return keep is None or name in keep
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        keep = self.get_sparse_fields()
+        if keep is not None:
+            target = getattr(serializer, 'child', serializer)
+            for name in list(target.fields):
+                if name not in keep:
+                    target.fields.pop(name)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        return self.sparse_queryset(super().filter_queryset(queryset))
+
+    def paginate_queryset(self, queryset):
+        # Actions like bookings/history paginate without filter_queryset
+        return super().paginate_queryset(self.sparse_queryset(queryset))
+
+    def sparse_queryset(self, queryset):
+        columns = self.get_sparse_columns(queryset)
+        if columns is None:
+            return queryset
+        return queryset.only(*columns)
+
+    def get_sparse_columns(self, queryset):
+        keep = self.get_sparse_fields()
+        if keep is None or not hasattr(queryset, 'only'):
+            return None
+
+        model = queryset.model
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        sources = getattr(getattr(serializer, 'Meta', None), 'sparse_sources', {})
+
+        columns = {model._meta.pk.name}
+        for name in keep:
+            if name in sources:
+                columns.update(sources[name])
+                continue
+            source_attrs = serializer.fields[name].source_attrs
+            column = self.get_column(model, source_attrs[0] if source_attrs else None)
+            if column is None:
+                return None
+            columns.add(column)
+
+        # only() cannot defer a relation that select_related or
+        # prefetch_related goes through
+        select_related = queryset.query.select_related
+        if select_related is True:
+            return None
+        traversed = list(select_related or {})
+        for lookup in queryset._prefetch_related_lookups:
+            path = lookup.prefetch_through if isinstance(lookup, Prefetch) else lookup
+            traversed.append(path.split('__')[0])
+        for name in traversed:
+            column = self.get_column(model, name)
+            if column is not None:
+                columns.add(column)
+        return columns
+
+    def get_column(self, model, name):
+        if name is None:
+            return None
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete or field.many_to_many:
+            return None
+        return field.name
@@ -0,0 +1,539 @@
+import io
+import os
+import importlib.util
+import json
+import uuid
+import decimal
+import time
+import random
+import threading
+import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from account.models import OTPCode, User, UserProfile
+from base.models import (
+    Article,
+    ArticleImage,
+    Banner,
+    Booking,
+    BookingMember,
+    BookingTime,
+    Faculty,
+    Rating,
+    Room,
+    RoomFacility,
+    RoomImage,
+    RoomOccupancy,
+    StudyProgram,
+)
+from notification.models import Notification
+from myapp import settings as myapp_settings
+from myapp.my_utils import booking_code, cache_utils, reference_cache
+from myapp.custom_parsers import ORJSONParser
+from myapp.custom_renderers import ORJSONRenderer
+
+from base.api.urls import router as base_router
+from account.api.urls import router as account_router
+from notification.api.urls import router as notification_router
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'benchmark_baseline.json')
+
+# BENCHMARK_UPDATE=1 rewrites the baseline instead of checking against it
+BENCHMARK_UPDATE = os.environ.get('BENCHMARK_UPDATE') == '1'
+# Wall time depends on the host, it is only compared with BENCHMARK_TIMING=1
+# (on the machine that recorded the baseline), and then only fails when it
+# is well past it. Query counts and sizes are always checked
+BENCHMARK_TIMING = os.environ.get('BENCHMARK_TIMING') == '1'
+BENCHMARK_TIME_FACTOR = float(os.environ.get('BENCHMARK_TIME_FACTOR', 3))
+BENCHMARK_TIME_SLACK_MS = float(os.environ.get('BENCHMARK_TIME_SLACK_MS', 50))
+BENCHMARK_BYTES_FACTOR = 1.1
+
+USERS = 300
+ROOMS = 20
+BOOKING_DAYS = range(-60, 30)
+NOTIFICATIONS = 10000
+
+
+@tag('benchmark')
+class TestEndpointBenchmark(APITestCase):
+    """
+    Replays every router endpoint against a seeded dataset and compares
+    query count, wall time and response size with benchmark_baseline.json.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(0)
+        today = timezone.localdate()
+
+        faculty = Faculty.objects.create(faculty_name='Sains dan Teknologi')
+        studyprogram = StudyProgram.objects.create(
+            study_program_name='Informatika',
+            faculty=faculty,
+        )
+
+        users = User.objects.bulk_create([
+            User(
+                email=f'user{index}@student.uty.ac.id',
+                full_name=f'User {index}',
+                first_name='User',
+                is_active=True,
+                verification_status='verified',
+            )
+            for index in range(USERS)
+        ])
+        cls.admin = User.objects.create_superuser(
+            email='admin@uty.ac.id',
+            password='admin1234',
+            full_name='Admin',
+        )
+        cls.member = users[0]
+        cls.member.set_password('member1234')
+        cls.member.save()
+        cls.inactive = User.objects.create_user(
+            email='inactive@student.uty.ac.id',
+            password='inactive1234',
+            full_name='Inactive',
+        )
+        UserProfile.objects.bulk_create([
+            UserProfile(
+                user=user,
+                student_id_number=f'5210{index:06}',
+                birth_date='2000-01-01',
+                whatsapp_number='0888888888',
+                faculty=faculty,
+                studyprogram=studyprogram,
+            )
+            for index, user in enumerate(users)
+        ])
+        OTPCode.objects.bulk_create([
+            OTPCode(
+                code='1234',
+                expire=timezone.now() + datetime.timedelta(minutes=2),
+                user=user,
+            )
+            for user in (cls.member, cls.inactive)
+        ])
+
+        rooms = Room.objects.bulk_create([
+            Room(
+                room_name=f'Room {index}',
+                floor=index % 4 + 1,
+                room_type='meeting' if index % 2 else 'discussion',
+                room_capacity=8,
+                room_description='Ruangan diskusi',
+            )
+            for index in range(ROOMS)
+        ])
+        RoomImage.objects.bulk_create([
+            RoomImage(room=room, room_image=f'room_images/room{index}.jpeg')
+            for room in rooms
+            for index in range(3)
+        ])
+        RoomFacility.objects.bulk_create([
+            RoomFacility(
+                room=room,
+                facility_name=f'Facility {index}',
+                facility_icon=f'facility_icons/icon{index}.png',
+            )
+            for room in rooms
+            for index in range(5)
+        ])
+        bookingtimes = BookingTime.objects.bulk_create([
+            BookingTime(
+                bookingtime_id=str(index + 1),
+                start_time=datetime.time(8 + index),
+                end_time=datetime.time(9 + index),
+            )
+            for index in range(8)
+        ])
+
+        bookings = []
+        for day in BOOKING_DAYS:
+            booking_date = today + datetime.timedelta(days=day)
+            if day < 0:
+                statuses = ['completed', 'completed', 'rejected', 'canceled', 'expired']
+            else:
+                statuses = ['pending', 'active', 'canceled']
+            for room in rooms:
+                for bookingtime in bookingtimes:
+                    if rng.random() < 0.8:
+                        continue
+                    bookings.append(Booking(
+                        booking_date=booking_date,
+                        booking_status=rng.choice(statuses),
+                        booking_needs='Diskusi kelompok',
+                        bookingtime=bookingtime,
+                        room=room,
+                        user=cls.member if rng.random() < 0.05 else rng.choice(users),
+                    ))
+        # The member has a booking in progress for the create flow
+        bookings.append(Booking(
+            booking_date=today + datetime.timedelta(days=45),
+            booking_status='initiated',
+            room=rooms[0],
+            user=cls.member,
+        ))
+        for booking, pk in zip(bookings, Booking.reserve_ids(len(bookings))):
+            booking.id = pk
+            booking.booking_id = booking_code.encode(pk)
+        Booking.objects.bulk_create(bookings)
+        RoomOccupancy.rebuild()
+
+        BookingMember.objects.bulk_create([
+            BookingMember(booking=booking, user=user)
+            for booking in bookings
+            if booking.booking_status != 'initiated'
+            for user in [booking.user] + rng.sample(users, 2)
+        ])
+        Rating.objects.bulk_create([
+            Rating(
+                booking=booking,
+                rating_value=rng.randint(1, 5),
+                comment='Ruangan nyaman',
+            )
+            for booking in bookings
+            if booking.booking_status == 'completed' and rng.random() < 0.5
+        ])
+        Room.rebuild_ratings()
+
+        article_body = 'Lorem ipsum dolor sit amet. ' * 40
+        articles = Article.objects.bulk_create([
+            Article(
+                article_type='news',
+                article_title=f'Article {index}',
+                article_body=article_body,
+                article_excerpt=Article.make_excerpt(article_body),
+            )
+            for index in range(50)
+        ])
+        ArticleImage.objects.bulk_create([
+            ArticleImage(article=article, article_image=f'article_images/article{index}.jpeg')
+            for article in articles
+            for index in range(2)
+        ])
+        Article.update_cover_images()
+        Banner.objects.bulk_create([
+            Banner(banner_image=f'banner_images/banner{index}.jpeg')
+            for index in range(5)
+        ])
+        Notification.objects.bulk_create([
+            Notification(
+                notification_title='Booking Diajukan',
+                notification_body='Booking anda sedang diproses',
+                notification_type='booking',
+                user=None if index % 10 == 0 else (cls.member if index % 3 == 0 else rng.choice(users)),
+            )
+            for index in range(NOTIFICATIONS)
+        ])
+
+        cls.faculty = faculty
+        cls.studyprogram = studyprogram
+        cls.room = rooms[0]
+        cls.article = articles[0]
+        cls.notification = Notification.objects.filter(user=cls.member).first()
+        cls.pending_booking = Booking.objects.filter(user=cls.member, booking_status='pending').first()
+        cls.completed_booking = Booking.objects.filter(
+            user=cls.member, booking_status='completed', rating__isnull=True,
+        ).first()
+        cls.guest = users[1]
+        cls.today = today
+
+    def setUp(self):
+        # Measure the uncached path, not pages left by other tests
+        cache.clear()
+        # except for the reference tables, every running worker holds them
+        reference_cache.next_generation()
+        for model in (Faculty, StudyProgram, BookingTime):
+            model.cached.all()
+
+        # Keep FCM, MQTT, SMTP and the celery broker offline
+        for target in (
+            'firebase_admin.messaging.send',
+            'paho.mqtt.publish.single',
+            'celery.app.task.Task.apply_async',
+            'celery.result.AsyncResult.revoke',
+        ):
+            patcher = mock.patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def token(self, user):
+        return str(RefreshToken.for_user(user).access_token)
+
+    def scenarios(self):
+        member = self.member
+        day = str(self.today + datetime.timedelta(days=3))
+        roomimage = self.room.roomimage_set.first()
+        articleimage = self.article.articleimage_set.first()
+        bookingmember = BookingMember.objects.filter(booking=self.pending_booking).exclude(user=member).first()
+        rating = Rating.objects.first()
+
+        # name, method, url, data, user
+        return [
+            ('bookingtime-list', 'get', reverse('bookingtime-list'), None, member),
+            ('bookingtime-available', 'get', reverse('bookingtime-available'), {'date': day, 'room_id': self.room.room_id}, member),
+            ('bookingtime-matrix', 'get', reverse('bookingtime-matrix'), {'start_date': day, 'end_date': str(self.today + datetime.timedelta(days=16))}, member),
+            ('bookingtime-detail', 'get', reverse('bookingtime-detail', args=['1']), None, member),
+
+            ('booking-list', 'get', reverse('booking-list'), None, self.admin),
+            ('booking-list.cursor', 'get', reverse('booking-list'), {'pagination': 'cursor'}, self.admin),
+            ('booking-list.create', 'post', reverse('booking-list'), {'bookingtime_id_list': '["1", "2"]', 'booking_needs': 'Rapat'}, member),
+            ('booking-history', 'get', reverse('booking-history'), {'booking_status': 'completed'}, member),
+            ('booking-history.canceled', 'get', reverse('booking-history'), {'booking_status': 'canceled'}, member),
+            ('booking-history.fields', 'get', reverse('booking-history'), {'booking_status': 'completed', 'fields': 'booking_id,booking_date,booking_status,room'}, member),
+            ('booking-history.cursor', 'get', reverse('booking-history'), {'booking_status': 'completed', 'pagination': 'cursor'}, member),
+            ('booking-initialize', 'post', reverse('booking-initialize'), {'room_id': self.room.room_id, 'booking_date': day, 'bookingtime_id_list': []}, member),
+            ('booking-scan', 'post', reverse('booking-scan'), {}, member),
+            ('booking-validate', 'post', reverse('booking-validate'), {}, member),
+            ('booking-detail', 'get', reverse('booking-detail', args=[self.pending_booking.booking_id]), None, member),
+            ('booking-cancel-booking', 'post', reverse('booking-cancel-booking', args=[self.pending_booking.booking_id]), {'cancellation_reason': 'Batal'}, member),
+            ('booking-change-booking-status', 'post', reverse('booking-change-booking-status', args=[self.pending_booking.booking_id]), {'booking_status': 'rejected'}, self.admin),
+            ('booking-reschedule', 'post', reverse('booking-reschedule', args=[self.pending_booking.booking_id]), {'booking_date': str(self.today + datetime.timedelta(days=60)), 'bookingtime': '1'}, member),
+
+            ('room-list', 'get', reverse('room-list'), None, member),
+            ('room-list.omit', 'get', reverse('room-list'), {'omit': 'roomimages,room_description'}, member),
+            ('room-list.first_image', 'get', reverse('room-list'), {'first_image': 'true'}, member),
+            ('room-detail', 'get', reverse('room-detail', args=[self.room.room_id]), None, member),
+            ('room-ratings', 'get', reverse('room-ratings', args=[self.room.room_id]), None, member),
+            ('article-list', 'get', reverse('article-list'), None, member),
+            ('article-detail', 'get', reverse('article-detail', args=[self.article.article_id]), None, member),
+            ('articleimage-list', 'get', reverse('articleimage-list'), None, member),
+            ('articleimage-detail', 'get', reverse('articleimage-detail', args=[articleimage.articleimage_id]), None, member),
+            ('rating-list', 'get', reverse('rating-list'), None, member),
+            ('rating-list.create', 'post', reverse('rating-list'), {'booking': self.completed_booking.booking_id, 'rating_value': 4, 'comment': 'Bagus'}, member),
+            ('rating-detail', 'get', reverse('rating-detail', args=[rating.rating_id]), None, member),
+            ('bookingmember-list', 'get', reverse('bookingmember-list'), None, self.admin),
+            ('bookingmember-detail', 'get', reverse('bookingmember-detail', args=[bookingmember.bookingmember_id]), None, member),
+            ('faculty-list', 'get', reverse('faculty-list'), None, member),
+            ('faculty-detail', 'get', reverse('faculty-detail', args=[self.faculty.faculty_id]), None, member),
+            ('roomimage-list', 'get', reverse('roomimage-list'), None, member),
+            ('roomimage-detail', 'get', reverse('roomimage-detail', args=[roomimage.roomimage_id]), None, member),
+            ('studyprogram-list', 'get', reverse('studyprogram-list'), None, member),
+            ('studyprogram-detail', 'get', reverse('studyprogram-detail', args=[self.studyprogram.studyprogram_id]), None, member),
+            ('banner-list', 'get', reverse('banner-list'), None, member),
+            ('banner-detail', 'get', reverse('banner-detail', args=[Banner.objects.first().banner_id]), None, member),
+
+            ('user-list', 'get', reverse('user-list'), None, self.admin),
+            ('user-list.cursor', 'get', reverse('user-list'), {'pagination': 'cursor'}, self.admin),
+            ('user-change-email', 'post', reverse('user-change-email'), {'otp_code': '1234', 'email': 'member@student.uty.ac.id'}, member),
+            ('user-change-password', 'post', reverse('user-change-password'), {'old_password': 'member1234', 'new_password': 'member5678', 'confirm_password': 'member5678'}, member),
+            ('user-confirm-otp', 'post', reverse('user-confirm-otp'), {'otp': '1234', 'email': member.email}, None),
+            ('user-forgot-password', 'post', reverse('user-forgot-password'), {'email': member.email, 'new_password': 'member5678', 'confirm_password': 'member5678'}, None),
+            ('user-get-otp-change-email', 'post', reverse('user-get-otp-change-email'), {'email': 'member@student.uty.ac.id'}, member),
+            ('user-get-otp-change-privacy-key', 'post', reverse('user-get-otp-change-privacy-key'), {'email': member.email}, None),
+            ('user-get-otp-email-validation', 'post', reverse('user-get-otp-email-validation'), {'email': self.inactive.email}, member),
+            ('user-get-otp-forgot-password', 'post', reverse('user-get-otp-forgot-password'), {'email': member.email}, None),
+            ('user-login', 'post', reverse('user-login'), {'email': member.email, 'password': 'member1234'}, None),
+            ('user-logout', 'post', reverse('user-logout'), {}, member),
+            ('user-password-validation', 'post', reverse('user-password-validation'), {'password': 'member1234'}, member),
+            ('user-register', 'post', reverse('user-register'), {'email': 'new@student.uty.ac.id', 'password': 'new12345', 'confirm_password': 'new12345'}, None),
+            ('user-detail', 'get', reverse('user-detail', args=[member.user_id]), None, member),
+            ('user-me', 'get', reverse('user-me'), None, member),
+            ('user-change-verification-status', 'post', reverse('user-change-verification-status', args=[self.guest.user_id]), {'verification_status': 'suspend'}, self.admin),
+            ('userprofile-list', 'get', reverse('userprofile-list'), None, self.admin),
+            ('userprofile-update-profile', 'post', reverse('userprofile-update-profile'), {'whatsapp_number': '0812345678'}, member),
+            ('userprofile-detail', 'get', reverse('userprofile-detail', args=[member.userprofile.userprofile_id]), None, member),
+
+            ('notification-list', 'get', reverse('notification-list'), None, member),
+            ('notification-list.admin', 'get', reverse('notification-list'), None, self.admin),
+            ('notification-list.cursor', 'get', reverse('notification-list'), {'pagination': 'cursor'}, member),
+            ('notification-detail', 'get', reverse('notification-detail', args=[self.notification.notification_id]), None, member),
+        ]
+
+    def measure(self, method, url, data, user):
+        if user:
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token(user)}')
+        else:
+            self.client.credentials()
+
+        # Every request sees the same seeded state
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = getattr(self.client, method)(url, data, format='json' if method == 'post' else None)
+                elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+
+        return {
+            'status': response.status_code,
+            'queries': len(queries),
+            'time_ms': round(elapsed * 1000, 2),
+            'bytes': len(response.content),
+        }
+
+    def test_every_router_endpoint_is_benchmarked(self):
+        names = {name.split('.')[0] for name, *_ in self.scenarios()}
+        for router in (base_router, account_router, notification_router):
+            for url in router.urls:
+                if url.name and url.name != 'api-root':
+                    self.assertIn(url.name, names)
+
+    def test_endpoints_within_baseline(self):
+        results = {
+            name: self.measure(method, url, data, user)
+            for name, method, url, data, user in self.scenarios()
+        }
+
+        if BENCHMARK_UPDATE or not os.path.exists(BASELINE_PATH):
+            with open(BASELINE_PATH, 'w') as file:
+                json.dump(results, file, indent=4, sort_keys=True)
+                file.write('\n')
+            return
+
+        with open(BASELINE_PATH) as file:
+            baseline = json.load(file)
+
+        for name, result in results.items():
+            with self.subTest(endpoint=name):
+                self.assertIn(name, baseline, 'Run with BENCHMARK_UPDATE=1 to record new endpoints')
+                expected = baseline[name]
+                self.assertEqual(result['status'], expected['status'])
+                self.assertLessEqual(result['queries'], expected['queries'])
+                self.assertLessEqual(result['bytes'], expected['bytes'] * BENCHMARK_BYTES_FACTOR)
+                if BENCHMARK_TIMING:
+                    self.assertLessEqual(
+                        result['time_ms'],
+                        max(expected['time_ms'] * BENCHMARK_TIME_FACTOR, expected['time_ms'] + BENCHMARK_TIME_SLACK_MS),
+                    )
+
+
+class TestORJSONRenderer(SimpleTestCase):
+    def test_output_matches_stock_renderer(self):
+        data = {
+            'success': True,
+            'message': gettext_lazy('Data berhasil diambil'),
+            'data': [{
+                'user_id': uuid.UUID('6f1c1d5e-6c5b-4a7e-9f3b-2a9d1c0e4b11'),
+                'created_at': timezone.make_aware(datetime.datetime(2030, 1, 1, 8, 30, 15, 123456)),
+                'booking_date': datetime.date(2030, 1, 1),
+                'start_time': datetime.time(8, 0),
+                'room_rating': decimal.Decimal('4.25'),
+                'histogram': {1: 0, 5: 3},
+                'room_name': 'Ruang Diskusi \u2013 Lantai 2',
+            }],
+        }
+        self.assertEqual(
+            json.loads(ORJSONRenderer().render(data)),
+            json.loads(JSONRenderer().render(data)),
+        )
+
+    def test_non_finite_floats_raise_like_stock_renderer(self):
+        for value in (float('nan'), float('inf'), float('-inf')):
+            data = {'data': [{'room_rating': value, 'comment': None}]}
+            with self.assertRaises(ValueError):
+                JSONRenderer().render(data)
+            with self.assertRaises(ValueError):
+                ORJSONRenderer().render(data)
+        self.assertEqual(ORJSONRenderer().render({'room_rating': 4.5, 'comment': None}), b'{"room_rating":4.5,"comment":null}')
+
+    def load_settings(self, **environ):
+        # A fresh copy of myapp/settings.py, read under that environment
+        spec = importlib.util.spec_from_file_location('settings_copy', myapp_settings.__file__)
+        module = importlib.util.module_from_spec(spec)
+        with mock.patch.dict(os.environ, environ), \
+                mock.patch('firebase_admin.credentials.Certificate'), \
+                mock.patch('firebase_admin.initialize_app'):
+            spec.loader.exec_module(module)
+        return module
+
+    def test_browsable_api_only_in_debug(self):
+        for debug, renderers in (
+            ('True', ['myapp.custom_renderers.ORJSONRenderer', 'rest_framework.renderers.BrowsableAPIRenderer']),
+            ('False', ['myapp.custom_renderers.ORJSONRenderer']),
+        ):
+            with self.subTest(debug=debug):
+                settings = self.load_settings(DEBUG=debug)
+                self.assertEqual(settings.REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'], renderers)
+
+    def test_parser_rejects_invalid_json(self):
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"booking_needs": '))
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(b'{"room_id": 1}')), {'room_id': 1})
+
+
+class TestReferenceCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        reference_cache.local.clear()
+        self.faculty = Faculty.objects.create(faculty_name='Sains dan Teknologi')
+        # Later requests see the faculty as committed
+        reference_cache.next_generation()
+
+    def test_tables_are_read_once_and_follow_writes(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(Faculty.cached.get(self.faculty.faculty_id), self.faculty)
+            self.assertEqual(Faculty.cached.get(str(self.faculty.faculty_id)), self.faculty)
+            self.assertIsNone(Faculty.cached.get('abc'))
+
+        # Another worker starts from the shared tier
+        reference_cache.local.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(list(Faculty.cached.all()), [self.faculty.faculty_id])
+
+        self.faculty.faculty_name = 'Saintek'
+        self.faculty.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(Faculty.cached.get(self.faculty.faculty_id).faculty_name, 'Saintek')
+
+    def test_other_workers_writes_are_seen_by_the_next_request(self):
+        Faculty.cached.all()
+        Faculty.objects.filter(pk=self.faculty.pk).update(faculty_name='Saintek')
+        cache_utils.bump_version('faculties')
+        self.assertEqual(Faculty.cached.get(self.faculty.faculty_id).faculty_name, 'Sains dan Teknologi')
+
+        reference_cache.next_generation()
+        self.assertEqual(Faculty.cached.get(self.faculty.faculty_id).faculty_name, 'Saintek')
+
+    def test_uncommitted_rows_stay_out_of_the_cache(self):
+        Faculty.cached.all()
+        with transaction.atomic():
+            faculty = Faculty.objects.create(faculty_name='Kesehatan')
+            self.assertIn(faculty.faculty_id, Faculty.cached.all())
+            transaction.set_rollback(True)
+
+        # Read again from the database, the cache holds no rolled back row
+        reference_cache.next_generation()
+        with self.assertNumQueries(1):
+            self.assertNotIn(faculty.faculty_id, Faculty.cached.all())
+
+
+class TestGetOrSetOnce(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.compute = mock.Mock(return_value={'data': 1})
+
+    def test_waits_for_the_lock_holder(self):
+        cache.add('lock:payload', 1)
+        # The holder stores its value while this call waits
+        timer = threading.Timer(0.1, cache.set, ['payload', {'data': 2}])
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        self.assertEqual(cache_utils.get_or_set_once('payload', self.compute, 60), {'data': 2})
+        self.compute.assert_not_called()
+
+    def test_computes_once_and_releases_the_lock(self):
+        self.assertEqual(cache_utils.get_or_set_once('payload', self.compute, 60), {'data': 1})
+        self.assertEqual(cache_utils.get_or_set_once('payload', self.compute, 60), {'data': 1})
+        self.compute.assert_called_once()
+        self.assertIsNone(cache.get('lock:payload'))
+
+        self.compute.side_effect = ValueError
+        with self.assertRaises(ValueError):
+            cache_utils.get_or_set_once('other', self.compute, 60)
+        self.assertIsNone(cache.get('lock:other'))
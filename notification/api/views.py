@@ -7,11 +7,15 @@ from notification.models import Notification
 from notification.api.serializers import NotificationModelSerializer
 
 from myapp.my_utils.custom_response import CustomResponse
+from myapp.sparse_fieldsets import SparseFieldsetMixin
 
-class NotificationModelViewSet(ModelViewSet):
+class NotificationModelViewSet(SparseFieldsetMixin, ModelViewSet):
     queryset = Notification.objects.all()
     serializer_class = NotificationModelSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Same direction as the page number list
+    cursor_ordering = ('created_at', 'pk')
+    count_strategy = 'cached'
 
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('notification_id', models.AutoField(editable=False, primary_key=True, serialize=False, unique=True)),
+                ('notification_title', models.CharField(max_length=255)),
+                ('notification_body', models.TextField()),
+                ('notification_type', models.CharField(max_length=50)),
+                ('notification_topic', models.CharField(blank=True, max_length=50, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('write', models.BooleanField(default=True)),
+                ('user', models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -1,8 +1,10 @@
+import uuid
+import logging
 import datetime
 
 from django.utils import timezone
-from django.db import models
-from django.db.models.signals import post_save, pre_save, pre_delete
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete
 from django.dispatch import receiver
 from django.conf import settings
 
@@ -24,10 +26,27 @@ from .tasks import (
 
 from firebase_admin import messaging
 
+from myapp.my_utils import cache_utils
+
 from celery.result import AsyncResult
 
 
+logger = logging.getLogger(__name__)
+
+
 class Notification(models.Model):
+    class Meta:
+        indexes = [
+            # list: notifications of a user since the user joined
+            models.Index(fields=["user", "created_at"], name="notification_user_idx"),
+            # list: broadcast notifications (no user), e.g. new articles
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(user__isnull=True),
+                name="notification_broadcast_idx",
+            ),
+        ]
+
     notification_id = models.AutoField(primary_key=True, unique=True, editable=False)
     notification_title = models.CharField(max_length=255)
     notification_body = models.TextField()
@@ -53,7 +72,9 @@ class Notification(models.Model):
                     priority='high',
                 )
             )
-            messaging.send(message)
+            # Only push once the notification (and the write that caused it)
+            # is committed
+            transaction.on_commit(lambda: send_push(message))
         
         # if self.write equals to False, then don't save the notification
         if self.write:
@@ -62,6 +83,21 @@ class Notification(models.Model):
             return False
 
 
+def send_push(message):
+    if not settings.FCM_ENABLED:
+        logger.info('FCM disabled, not sending %s to %s', message.data, message.topic)
+        return
+    messaging.send(message)
+
+
+def apply_async_on_commit(task, args, eta):
+    # Schedule the task once the surrounding transaction commits, so a
+    # rolled back booking write leaves no task behind
+    task_id = str(uuid.uuid4())
+    transaction.on_commit(lambda: task.apply_async(args, eta=eta, task_id=task_id))
+    return task_id
+
+
 # @receiver(post_save, sender=Notification)
 # def notification_created_send_notification(sender, instance, created, **kwargs):
 #     if created:
@@ -80,7 +116,10 @@ class Notification(models.Model):
 #     print('NOTIFICATION SENT SUCCESSFULLY: ', response)
 
 @receiver(pre_save, sender=User)
-def user_verification_status(sender, instance, **kwargs):
+def user_verification_status(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'verification_status' not in update_fields:
+        return False
+
     user = sender.objects.filter(user_id=instance.user_id).first()
     if not user:
         return False
@@ -120,7 +159,7 @@ def user_verification_status(sender, instance, **kwargs):
         notification_type='Vefifikasi Akun',
         notification_title=title,
         notification_body=message,
-        notification_topic=instance.user_id,
+        notification_topic=str(instance.user_id),
         user=instance
     )
 
@@ -131,7 +170,7 @@ def userprofile_notification(sender, instance, created, **kwargs):
             notification_type='Registrasi Akun',
             notification_title="Registrasi Akun",
             notification_body=f"Hai {instance.user.first_name}, selamat datang di aplikasi kami. Silahkan lengkapi data diri anda.",
-            notification_topic=instance.user.user_id,
+            notification_topic=str(instance.user.user_id),
             user=instance.user
         )
 
@@ -170,12 +209,13 @@ def booking_status_notification(sender, instance, **kwargs):
             timezone.get_current_timezone()
         )
         
-        task = booking_expired_check.apply_async(
+        task_id = apply_async_on_commit(
+            booking_expired_check,
             (instance.booking_id,),
             eta=aware_start_date_time
         )
 
-        print(f"\nMENAMBAH TASK (BOOKING EXPIRED CHECK): {task.id}")
+        print(f"\nMENAMBAH TASK (BOOKING EXPIRED CHECK): {task_id}")
 
     elif instance.booking_status == "active":
         title = "Booking Disetujui"
@@ -243,28 +283,29 @@ def booking_status_notification(sender, instance, **kwargs):
 
         for bookingmember in bookingmembers:
             for notification in notification_dict:
-                task = send_scheduled_notification.apply_async(
+                task_id = apply_async_on_commit(
+                    send_scheduled_notification,
                     (
                         notification['title'],
                         notification['message'],
-                        bookingmember.user.user_id,
+                        str(bookingmember.user.user_id),
                         notification['booking_id'],
                         notification['write'],
                     ),
                     eta=notification['eta']
                 )
                 CeleryTask.objects.create(
-                    task_id=task.id,
+                    task_id=task_id,
                     booking=instance
                 )
-                print(f"MENAMBAH TASK (NOTIFICATION) untuk booking id {instance.booking_id}: {task.id}")
+                print(f"MENAMBAH TASK (NOTIFICATION) untuk booking id {instance.booking_id}: {task_id}")
 
         for bookingmember in bookingmembers.exclude(user=instance.user):
             Notification.objects.create(
                 notification_type='Booking',
                 notification_title='Anda Ditambahkan ke Booking',
                 notification_body=f"Hai {bookingmember.user.first_name}, anda telah ditambahkan oleh {instance.user.first_name} pada {instance.booking_date} di {instance.room.room_name}.",
-                notification_topic=bookingmember.user.user_id,
+                notification_topic=str(bookingmember.user.user_id),
                 user=bookingmember.user
             )
             
@@ -285,7 +326,7 @@ def booking_status_notification(sender, instance, **kwargs):
         notification_type='Booking',
         notification_title=title,
         notification_body=message,
-        notification_topic=instance.user.user_id,
+        notification_topic=str(instance.user.user_id),
         user=instance.user
     )
 
@@ -294,7 +335,7 @@ def booking_status_notification(sender, instance, **kwargs):
 @receiver(pre_delete, sender=CeleryTask)
 def delete_celery_task(sender, instance, **kwargs):
     task = AsyncResult(instance.task_id)
-    task.revoke()
+    transaction.on_commit(task.revoke)
 
 
 # if booking deleted, then delete all related celery tasks
@@ -319,5 +360,10 @@ def article_notification(sender, instance, created, **kwargs):
         )
 
 
-
-
+# Drop the cached page counts of the notification and user lists
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_page_counts(sender, instance, **kwargs):
+    transaction.on_commit(lambda: cache_utils.bump_version(cache_utils.count_version_name(sender)))
@@ -1,3 +1,120 @@
-from django.test import TestCase
+import datetime
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APITestCase
+
+from account.models import User
+from notification.models import Notification
+
+
+class TestNotificationIndexes(APITestCase):
+    def setUp(self):
+        self.users = User.objects.bulk_create([
+            User(email=f'notification{index}@gmail.com', full_name=f'Test Notification {index}')
+            for index in range(20)
+        ])
+        now = timezone.now()
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                notification_title='Test',
+                notification_body='Test',
+                notification_type='booking',
+                # every tenth notification is a broadcast
+                user=None if index % 10 == 0 else self.users[index % len(self.users)],
+            )
+            for index in range(2000)
+        ])
+        for index, notification in enumerate(notifications):
+            notification.created_at = now - datetime.timedelta(hours=index)
+        Notification.objects.bulk_update(notifications, ['created_at'])
+
+    def test_list_uses_user_and_broadcast_indexes(self):
+        user = self.users[1]
+        queryset = Notification.objects.filter(
+            Q(user__user_id=user.user_id) | Q(user__user_id=None),
+            created_at__gte=user.created_at - datetime.timedelta(days=30),
+        ).order_by('created_at')
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE notification_notification')
+        plan = queryset.explain()
+        self.assertIn('notification_user_idx', plan)
+        self.assertIn('notification_broadcast_idx', plan)
+
+
+class TestNotificationCursorPagination(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(email='cursor@gmail.com', full_name='Test Cursor')
+        self.user.created_at = timezone.now() - datetime.timedelta(days=1)
+        self.user.save()
+        # One bulk insert, so pk has to break the created_at ties
+        self.notifications = Notification.objects.bulk_create([
+            Notification(
+                notification_title='Test',
+                notification_body='Test',
+                notification_type='booking',
+                user=self.user,
+            )
+            for _ in range(25)
+        ])
+        Notification.objects.update(created_at=timezone.now())
+        self.client.force_authenticate(self.user)
+
+    def test_cursor_pages_cover_every_notification_once(self):
+        response = self.client.get(reverse('notification-list'), {'pagination': 'cursor', 'page_size': 10})
+        self.assertNotIn('count', response.data)
+        pages = [[notification['notification_id'] for notification in response.data['data']]]
+        while response.data['next']:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(response.data['next'])
+            self.assertEqual(len(queries), 1)
+            # Keyset on (created_at, pk), every created_at is tied here
+            self.assertNotIn('OFFSET', queries[0]['sql'])
+            self.assertTrue(response.data['success'])
+            pages.append([notification['notification_id'] for notification in response.data['data']])
+
+        ids = [pk for page in pages for pk in page]
+        self.assertEqual(ids, sorted(notification.notification_id for notification in self.notifications))
+
+        # And back again, page by page
+        for page in reversed(pages[:-1]):
+            response = self.client.get(response.data['previous'])
+            self.assertEqual([notification['notification_id'] for notification in response.data['data']], page)
+        self.assertIsNone(response.data['previous'])
+
+    def test_page_size_is_capped(self):
+        Notification.objects.bulk_create([
+            Notification(notification_title='Test', notification_body='Test', notification_type='booking', user=self.user)
+            for _ in range(100)
+        ])
+        response = self.client.get(reverse('notification-list'), {'page_size': 1000})
+        self.assertEqual(len(response.data['data']), 100)
+        self.assertEqual(response.data['count'], 125)
+        response = self.client.get(reverse('notification-list'), {'pagination': 'cursor', 'page_size': 1000})
+        self.assertEqual(len(response.data['data']), 100)
+
+    @mock.patch('notification.models.messaging.send')
+    def test_cached_count_is_reused_until_a_notification_is_written(self, messaging_send):
+        cache.clear()
+        url = reverse('notification-list')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual((response.data['count'], response.data['count_exact']), (25, True))
+
+        with self.assertNumQueries(len(queries) - 1):
+            response = self.client.get(url)
+        self.assertEqual((response.data['count'], response.data['count_exact']), (25, False))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(
+                notification_title='Test', notification_body='Test', notification_type='booking', user=self.user,
+            )
+        response = self.client.get(url)
+        self.assertEqual((response.data['count'], response.data['count_exact']), (26, True))